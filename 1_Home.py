@@ -1,7 +1,9 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta 
-from utils import load_data_from_csv # 💡 공용 함수 임포트
+from datetime import datetime
+from utils import load_dashboard_data, get_data_version, get_partition_manifest, is_contract_imminent, is_activity_overdue # 💡 공용 함수 임포트
+from partitions import manifest_regions, region_mapping_missing, summarize_partitions
+from kpi_engine import get_kpi_engine, date_range_sidebar
 
 # -----------------------------------------------------------------
 # 1. 페이지 설정 및 데이터 로드
@@ -9,7 +11,19 @@ from utils import load_data_from_csv # 💡 공용 함수 임포트
 st.set_page_config(page_title="KOL 대시보드 (Home)", layout="wide")
 st.title("📊 KOL 활동 관리 대시보드 (MVP)")
 
-master_df, activities_df = load_data_from_csv() # 💡 함수 이름 변경
+# 💡 지역 선택: '전체'가 아니면 해당 지역 파티션 파일만 로드
+manifest = get_partition_manifest(get_data_version())
+region_options = ["전체"] + (manifest_regions(manifest) if manifest is not None else [])
+if st.session_state.get('selected_region') not in region_options:
+    st.session_state.selected_region = "전체"
+selected_region = st.sidebar.selectbox("지역 (Region)을 선택하세요:", region_options, key='selected_region')
+if manifest is not None and region_mapping_missing(manifest):
+    st.sidebar.warning("국가 -> 지역 매핑이 비어 있어 모든 KOL 이 '기타' 지역으로 분류됩니다. "
+                       "contracts 의 Region 열, 또는 utils.py 의 REGION_MAP / REGION_TRACKING_CHART 를 설정하세요.")
+elif manifest is not None and manifest.get('unmapped_countries'):
+    st.sidebar.caption(f"ℹ️ 지역 매핑이 없는 국가 ('기타'로 분류): {', '.join(manifest['unmapped_countries'])}")
+
+master_df, activities_df, data_version = load_dashboard_data()
 
 # -----------------------------------------------------------------
 # 2. 사이드바 (모든 페이지 공통)
@@ -17,8 +31,8 @@ master_df, activities_df = load_data_from_csv() # 💡 함수 이름 변경
 st.sidebar.subheader("KOL 상세 조회 필터")
 if master_df is not None:
     kol_names = master_df['Name'].tolist()
-    # 'selected_kol'이라는 세션 상태(st.session_state)를 사용해 선택을 기억
-    if 'selected_kol' not in st.session_state:
+    # 'selected_kol'이라는 세션 상태(st.session_state)를 사용해 선택을 기억 (지역이 바뀌어 목록에 없으면 초기화)
+    if st.session_state.get('selected_kol') not in ["전체"] + kol_names:
         st.session_state.selected_kol = "전체"
 
     selected_name = st.sidebar.selectbox(
@@ -26,6 +40,10 @@ if master_df is not None:
         ["전체"] + kol_names, 
         key='selected_kol' # 세션 상태와 연결
     )
+
+    # 💡 기간 필터: 슬라이더를 움직여도 누적합 엔진으로만 계산 (원본 재스캔 없음)
+    engine = get_kpi_engine(data_version, master_df, activities_df)
+    start_date, end_date = date_range_sidebar(engine)
 else:
     selected_name = st.sidebar.selectbox("KOL 이름을 선택하세요:", ["전체"])
 
@@ -41,16 +59,22 @@ if master_df is not None and activities_df is not None:
         # ===================================
         st.header("1. KPI 요약")
         
-        total_budget = master_df['Budget (USD)'].sum()
-        total_spent = master_df['Spent (USD)'].sum()
-        avg_completion = master_df['Completion_Rate'].mean()
-        avg_utilization = (total_spent / total_budget) * 100 if total_budget > 0 else 0
+        kpis = engine.kpis(start_date, end_date)
         
         col_kpi1, col_kpi2, col_kpi3, col_kpi4 = st.columns(4)
-        with col_kpi1: st.metric(label="총 KOL 인원", value=master_df.shape[0])
-        with col_kpi2: st.metric(label="총 예산 규모", value=f"${total_budget:,.0f}")
-        with col_kpi3: st.metric(label="평균 완료율", value=f"{avg_completion:.1f}%")
-        with col_kpi4: st.metric(label="예산 활용률", value=f"{avg_utilization:.1f}%")
+        with col_kpi1: st.metric(label="총 KOL 인원", value=kpis['total_kols'])
+        with col_kpi2: st.metric(label="총 예산 규모", value=f"${kpis['total_budget']:,.0f}")
+        with col_kpi3: st.metric(label="평균 완료율", value=f"{kpis['avg_completion']:.1f}%")
+        with col_kpi4: st.metric(label="예산 활용률", value=f"{kpis['avg_utilization']:.1f}%")
+
+        # 💡 지역 선택 시 전체 지역 KPI 는 파티션 요약 파일만으로 계산 (다른 지역 행은 읽지 않음)
+        #    요약 파일은 전체 기간 기준이므로, 기간 필터가 걸려 있으면 위 KPI 와 기준이 달라 표시하지 않음
+        if selected_region != "전체" and manifest is not None and start_date is None and end_date is None:
+            global_kpis = summarize_partitions(manifest)
+            st.caption(
+                f"🌐 전체 지역 · 전체 기간 기준: KOL {global_kpis['total_kols']}명 · 예산 ${global_kpis['total_budget']:,.0f} · "
+                f"평균 완료율 {global_kpis['avg_completion']:.1f}% · 예산 활용률 {global_kpis['avg_utilization']:.1f}%"
+            )
         
         st.divider()
 
@@ -62,11 +86,8 @@ if master_df is not None and activities_df is not None:
         today = datetime.now()
         alert_found = False
 
-        contract_alert_date = today + timedelta(days=30)
-        imminent_contracts = master_df[
-            (master_df['Contract_End'] <= contract_alert_date) &
-            (master_df['Contract_End'] >= today)
-        ].copy()
+        # 💡 판정 기준은 Raw Data 강조 표시 / 알림 스케줄러(alerts.py)와 같은 공용 함수 사용
+        imminent_contracts = master_df[is_contract_imminent(master_df['Contract_End'], today)].copy()
         
         with st.expander(f"🚨 계약 만료 임박 ({imminent_contracts.shape[0]} 건) - 30일 이내", expanded=False):
             if not imminent_contracts.empty:
@@ -76,9 +97,9 @@ if master_df is not None and activities_df is not None:
             else:
                 st.info("해당 없음")
 
-        overdue_activities = activities_df[
-            (activities_df['Due_Date'] < today) &
-            (activities_df['Status'] != 'Done')
+        window_activities = activities_df.iloc[engine.rows_in(start_date, end_date)]
+        overdue_activities = window_activities[
+            is_activity_overdue(window_activities['Due_Date'], window_activities['Status'], today)
         ].copy()
 
         with st.expander(f"🔥 활동 지연 ({overdue_activities.shape[0]} 건)", expanded=True): 
@@ -110,11 +131,11 @@ if master_df is not None and activities_df is not None:
             st.dataframe(kol_details.astype(str), use_container_width=True) 
             
             st.subheader("활동 내역 요약")
-            kol_activities = activities_df[activities_df['Kol_ID'] == selected_kol_id]
+            kol_pos = master_df.index.get_loc(kol_details.index[0])
+            kol_totals, kol_dones = engine.kol_counts(start_date, end_date)
+            total, done = int(kol_totals[kol_pos]), int(kol_dones[kol_pos])
             
-            if not kol_activities.empty:
-                total = kol_activities.shape[0]
-                done = kol_activities[kol_activities['Status'] == 'Done'].shape[0]
+            if total > 0:
                 completion_rate = (done / total) * 100 if total > 0 else 0
                 
                 kol_budget = kol_details['Budget (USD)'].iloc[0]
@@ -0,0 +1,308 @@
+import argparse
+import json
+import os
+import smtplib
+import time
+import urllib.request
+from collections import defaultdict
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+import pandas as pd
+
+from history import HISTORY_DIR, last_seq, read_delta, rebuild_snapshot, record_snapshot
+from utils import get_data_version, read_source_frames, is_contract_imminent, is_activity_overdue
+
+# -----------------------------------------------------------------
+# 0. 설정
+# -----------------------------------------------------------------
+# 브라우저 세션 없이 실행되는 알림 스케줄러입니다.
+#   python alerts.py --sink file:alerts/digest.log --interval 60
+#   python alerts.py --sink smtp:localhost:1025 --once
+#   python alerts.py --sink webhook:http://localhost:8000/hook
+
+ALERTS_DIR = "alerts"
+ALERT_STATE_FILE = os.path.join(ALERTS_DIR, "state.json")
+ALERT_DAYS = 30  # 계약 만료 임박 기준 (Home / Raw Data 와 동일)
+
+# -----------------------------------------------------------------
+# 1. 알림 전송 대상 (Sink)
+# -----------------------------------------------------------------
+
+class FileSink:
+    """다이제스트를 텍스트 파일 끝에 추가합니다."""
+
+    def __init__(self, path=os.path.join(ALERTS_DIR, "digest.log")):
+        self.path = path
+
+    def send(self, subject, body, alerts):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(f"===== {subject} =====\n{body}\n\n")
+
+
+class SmtpSink:
+    """로컬 SMTP 서버(예: python -m aiosmtpd -n -l localhost:1025)로 메일을 보냅니다."""
+
+    def __init__(self, host="localhost", port=1025, sender="kol-dashboard@localhost", recipients=("team@localhost",)):
+        self.host, self.port = host, int(port)
+        self.sender, self.recipients = sender, list(recipients)
+
+    def send(self, subject, body, alerts):
+        message = EmailMessage()
+        message["Subject"] = subject
+        message["From"] = self.sender
+        message["To"] = ", ".join(self.recipients)
+        message.set_content(body)
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            smtp.send_message(message)
+
+
+class WebhookSink:
+    """JSON 을 HTTP POST 로 보냅니다. (Slack/Teams 웹훅 등)"""
+
+    def __init__(self, url):
+        self.url = url
+
+    def send(self, subject, body, alerts):
+        payload = json.dumps({"subject": subject, "text": body, "alerts": alerts}, ensure_ascii=False).encode("utf-8")
+        request = urllib.request.Request(self.url, data=payload, headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=10) as response:
+            response.read()
+
+
+SINKS = {"file": FileSink, "smtp": SmtpSink, "webhook": WebhookSink}
+
+def make_sink(spec):
+    """'file:경로', 'smtp:호스트:포트', 'webhook:URL' 형식의 문자열로 Sink 를 만듭니다."""
+    kind, _, arg = spec.partition(":")
+    if kind not in SINKS:
+        raise ValueError(f"알 수 없는 sink '{kind}' (사용 가능: {', '.join(SINKS)})")
+    if kind == "webhook" and not arg:
+        raise ValueError("webhook sink 에는 URL 이 필요합니다. (예: webhook:http://localhost:8000/hook)")
+    if kind == "smtp" and arg:
+        host, _, port = arg.partition(":")
+        return SmtpSink(host, port or 1025)
+    return SINKS[kind](arg) if arg else SINKS[kind]()
+
+# -----------------------------------------------------------------
+# 2. 증분 알림 추적기
+# -----------------------------------------------------------------
+
+# 테이블별 알림 종류와 기준 날짜 컬럼
+ALERT_RULES = {
+    "master": ("contract_expiry", "Contract_End"),
+    "activities": ("activity_overdue", "Due_Date"),
+}
+
+class AlertTracker:
+    """
+    현재 스냅샷과 '조건이 새로 성립하는 날 -> 행 키' 버킷을 메모리에 유지합니다.
+    매 실행마다 (새 데이터 버전에서 바뀐 행) + (날짜가 지나 조건이 새로 성립한 행) 만 다시 판정하므로
+    비용은 전체 테이블이 아니라 변경 건수에 비례합니다.
+    """
+
+    def __init__(self, history_root=HISTORY_DIR, state_path=ALERT_STATE_FILE, alert_days=ALERT_DAYS):
+        self.history_root = history_root
+        self.state_path = state_path
+        self.alert_days = alert_days
+        self.state = self._load_state()
+        self.snapshot = {}
+        self.trigger_days = {table: defaultdict(set) for table in ALERT_RULES}
+        self.row_trigger = {table: {} for table in ALERT_RULES}
+        self.kol_names = {}
+        self.snapshot_seq = 0  # 메모리 스냅샷이 반영한 데이터 버전
+        # 💡 전송 성공(commit) 전까지 보관: 다시 판정할 후보 행, 삭제된 행 키, 처리한 최신 버전
+        self.unsent = {table: set() for table in ALERT_RULES}
+        self.unsent_deleted = {table: set() for table in ALERT_RULES}
+        self.collected_seq = None
+
+    # --- 상태 파일 (처리한 버전, 마지막 실행일, 이미 보낸 알림) ---
+    def _load_state(self):
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding="utf-8") as f:
+                return json.load(f)
+        return {"processed_seq": 0, "last_day": None, "source_version": None, "delivered": {t: {} for t in ALERT_RULES}}
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    # --- 날짜 버킷 ---
+    def _trigger_day(self, table, row):
+        """이 행의 알림 조건이 처음 성립하는 날짜 (없으면 None)"""
+        day = row[ALERT_RULES[table][1]]
+        if pd.isnull(day):
+            return None
+        day = pd.Timestamp(day).normalize()
+        if table == "activities":
+            return None if row["Status"] == "Done" else day + timedelta(days=1)
+        return day - timedelta(days=self.alert_days)
+
+    def _reindex_rows(self, table, row_keys, after):
+        """행 키들의 날짜 버킷을 갱신합니다. (after 이후에 조건이 성립하는 행만 등록)"""
+        buckets, row_trigger = self.trigger_days[table], self.row_trigger[table]
+        frame = self.snapshot[table]
+        for key in row_keys:
+            old_day = row_trigger.pop(key, None)
+            if old_day is not None:
+                buckets[old_day].discard(key)
+            if key not in frame.index:
+                continue
+            day = self._trigger_day(table, frame.loc[key])
+            if day is not None and day > after:
+                buckets[day.date().isoformat()].add(key)
+                row_trigger[key] = day.date().isoformat()
+
+    def _load_snapshot(self, seq, after):
+        master, activities = rebuild_snapshot(seq, self.history_root, keep_row_key=True)
+        self.snapshot = {"master": master, "activities": activities}
+        self.kol_names = dict(zip(master["Kol_ID"], master["Name"]))
+        for table in ALERT_RULES:
+            self._reindex_rows(table, self.snapshot[table].index, after)
+
+    # --- 실행 1회 ---
+    def refresh_source(self):
+        """원본 파일이 바뀐 경우에만 읽어서 새 데이터 버전으로 기록합니다."""
+        source_version = get_data_version()
+        if source_version != self.state["source_version"]:
+            record_snapshot(*read_source_frames(), root=self.history_root)
+            self.state["source_version"] = source_version
+
+    def collect(self, today=None):
+        """
+        새로 성립한 알림 목록과, 전송 성공 시 반영할 delivered 갱신분을 반환합니다.
+        저장되는 상태(처리한 버전, 마지막 실행일, 보낸 알림)는 바꾸지 않고, 이번에 찾은 후보 행은 commit() 전까지
+        unsent 에 남겨 둡니다. 전송이 실패하면 다음 실행에서 같은 후보를 다시 판정합니다.
+        """
+        today = pd.Timestamp(today or datetime.now()).normalize()
+        last_day = pd.Timestamp(self.state["last_day"]) if self.state["last_day"] else today
+        latest = last_seq(self.history_root)
+        candidates = self.unsent
+
+        if not self.snapshot:
+            if latest == 0:
+                return [], {}
+            # 시작 시 1회: 마지막 처리 버전 스냅샷을 복원 (처음 실행이면 최신 버전 전체가 대상)
+            # 재시작이면 마지막 실행일 이후에 조건이 성립한 행이 (2) 에서 잡히도록 last_day 기준으로 버킷 등록
+            self.snapshot_seq = self.state["processed_seq"] or latest
+            self._load_snapshot(self.snapshot_seq, last_day)
+            if not self.state["processed_seq"]:
+                for table in ALERT_RULES:
+                    candidates[table] |= set(self.snapshot[table].index)
+
+        # (1) 메모리 스냅샷 이후 새 데이터 버전의 변경 행
+        for seq in range(self.snapshot_seq + 1, latest + 1):
+            for table in ALERT_RULES:
+                changed, deleted = read_delta(seq, table, self.history_root)
+                frame = self.snapshot[table]
+                self.snapshot[table] = pd.concat([frame.drop(index=deleted.union(changed.index), errors="ignore"), changed])
+                self.unsent_deleted[table] |= set(deleted)
+                if table == "master":
+                    self.kol_names.update(zip(changed["Kol_ID"], changed["Name"]))
+                candidates[table] |= set(changed.index) | set(deleted)
+        self.snapshot_seq = max(self.snapshot_seq, latest)
+        self.collected_seq = self.snapshot_seq
+
+        # (2) 지난 실행 이후 날짜가 바뀌어 조건이 새로 성립한 행 (버킷에서 꺼낸 행은 commit 전까지 unsent 에 보관)
+        for table in ALERT_RULES:
+            day = last_day + timedelta(days=1)
+            while day <= today:
+                candidates[table] |= self.trigger_days[table].pop(day.date().isoformat(), set())
+                day += timedelta(days=1)
+
+        # (3) 후보 행만 공용 판정 함수로 다시 판정
+        alerts, delivered_updates = [], {table: {} for table in ALERT_RULES}
+        for table, keys in candidates.items():
+            self._reindex_rows(table, keys, today)
+            rows = self.snapshot[table].loc[self.snapshot[table].index.intersection(list(keys))]
+            if rows.empty:
+                continue
+            kind, date_column = ALERT_RULES[table]
+            if table == "master":
+                active = rows[is_contract_imminent(rows[date_column], today, self.alert_days)]
+            else:
+                active = rows[is_activity_overdue(rows[date_column], rows["Status"], today)]
+
+            for key, row in active.iterrows():
+                alert_key = f"{kind}|{pd.Timestamp(row[date_column]).date().isoformat()}"
+                if key not in self.unsent_deleted[table] and self.state["delivered"][table].get(key) == alert_key:
+                    continue
+                alerts.append(self._describe(kind, key, row, date_column, today))
+                delivered_updates[table][key] = alert_key
+        return alerts, delivered_updates
+
+    def _describe(self, kind, key, row, date_column, today):
+        date = pd.Timestamp(row[date_column]).normalize()
+        if kind == "contract_expiry":
+            return {"kind": kind, "key": key, "name": row.get("Name", row["Kol_ID"]), "detail": row.get("Country", ""),
+                    "date": date.date().isoformat(), "days": int((date - today).days)}
+        return {"kind": kind, "key": key, "name": self.kol_names.get(row["Kol_ID"], row["Kol_ID"]), "detail": row.get("Activity_Type", ""),
+                "date": date.date().isoformat(), "days": int((today - date).days)}
+
+    def commit(self, delivered_updates, today=None):
+        """전송에 성공한 알림을 delivered 에 반영하고, 처리한 버전/실행일을 앞으로 옮겨 상태를 저장합니다."""
+        for table in ALERT_RULES:
+            for key in self.unsent_deleted[table]:
+                self.state["delivered"][table].pop(key, None)
+            self.state["delivered"][table].update(delivered_updates.get(table, {}))
+            self.unsent[table].clear()
+            self.unsent_deleted[table].clear()
+        if self.collected_seq is not None:
+            self.state["processed_seq"] = self.collected_seq
+        self.state["last_day"] = pd.Timestamp(today or datetime.now()).normalize().date().isoformat()
+        self._save_state()
+
+# -----------------------------------------------------------------
+# 3. 다이제스트 작성 및 스케줄러 루프
+# -----------------------------------------------------------------
+
+def format_digest(alerts, today=None):
+    """알림 목록을 Home 화면과 같은 분류로 묶어 텍스트 다이제스트로 만듭니다."""
+    today = pd.Timestamp(today or datetime.now())
+    contracts = [a for a in alerts if a["kind"] == "contract_expiry"]
+    overdue = [a for a in alerts if a["kind"] == "activity_overdue"]
+    subject = f"[KOL 알림] {today:%Y-%m-%d} 계약 만료 임박 {len(contracts)}건 / 활동 지연 {len(overdue)}건"
+
+    lines = []
+    if contracts:
+        lines.append(f"🚨 계약 만료 임박 ({len(contracts)} 건) - {ALERT_DAYS}일 이내")
+        lines += [f"  - {a['name']} ({a['detail']}): {a['date']} (D-{a['days']})" for a in sorted(contracts, key=lambda a: a["date"])]
+    if overdue:
+        lines.append(f"🔥 활동 지연 ({len(overdue)} 건)")
+        lines += [f"  - {a['name']} / {a['detail']}: {a['date']} ({a['days']}일 지연)" for a in sorted(overdue, key=lambda a: a["date"])]
+    return subject, "\n".join(lines)
+
+def run_once(tracker, sink, today=None):
+    """데이터 확인 -> 새 알림 수집 -> 다이제스트 전송 -> 상태 저장. 보낸 알림 수를 반환합니다."""
+    tracker.refresh_source()
+    alerts, delivered_updates = tracker.collect(today)
+    if alerts:
+        subject, body = format_digest(alerts, today)
+        sink.send(subject, body, alerts)
+    tracker.commit(delivered_updates, today)
+    return len(alerts)
+
+def main():
+    parser = argparse.ArgumentParser(description="KOL 계약 만료 / 활동 지연 알림 다이제스트 스케줄러")
+    parser.add_argument("--sink", default="file", help="file[:경로] | smtp[:호스트:포트] | webhook:URL")
+    parser.add_argument("--interval", type=int, default=60, help="확인 주기 (초)")
+    parser.add_argument("--once", action="store_true", help="한 번만 실행하고 종료")
+    args = parser.parse_args()
+
+    tracker, sink = AlertTracker(), make_sink(args.sink)
+    while True:
+        try:
+            sent = run_once(tracker, sink)
+            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] 새 알림 {sent}건 전송")
+        except Exception as e:
+            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] 알림 처리 실패: {e}")
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
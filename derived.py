@@ -0,0 +1,113 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import threading
+from typing import Callable, NamedTuple
+from schema import SCHEMAS
+
+# -----------------------------------------------------------------
+# 0. 파생 열 계산식 (벡터 연산)
+# -----------------------------------------------------------------
+
+def done_flags(status):
+    """활동 상태가 'Done' 이면 1, 아니면 0"""
+    return status.eq('Done').astype(int)
+
+def completion_rate(kol_ids, activity_kol_ids, done):
+    """KOL 행마다 (완료 활동 수 / 전체 활동 수) * 100. 활동이 없으면 0. (Kol_ID 중복 행은 같은 값)"""
+    kol_codes, uniques = pd.factorize(kol_ids)
+    activity_codes = uniques.get_indexer(activity_kol_ids)
+    matched = activity_codes >= 0
+    total = np.bincount(activity_codes[matched], minlength=len(uniques))
+    done_count = np.bincount(activity_codes[matched], weights=np.asarray(done, dtype=float)[matched], minlength=len(uniques))
+
+    rates = np.zeros(len(uniques), dtype=float)
+    np.divide(done_count * 100.0, total, out=rates, where=total > 0)
+    return np.where(kol_codes >= 0, rates[kol_codes], 0.0)  # Kol_ID 가 빈 행은 0
+
+def utilization_rate(spent, budget):
+    """(지출 / 예산) * 100, 최대 100. 예산이 0 이고 지출도 0 이면 0."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rates = spent.to_numpy(dtype=float) / budget.to_numpy(dtype=float) * 100
+    return np.minimum(np.nan_to_num(rates, nan=0.0, posinf=100.0), 100.0)
+
+def year_month(due_date):
+    return due_date.dt.to_period('M').astype(str)
+
+# -----------------------------------------------------------------
+# 1. 파생 열 의존성 그래프
+# -----------------------------------------------------------------
+
+class DerivedColumn(NamedTuple):
+    table: str                  # 이 열이 붙는 테이블 (master / activities)
+    depends: tuple              # 필요한 열 ("테이블.열") - 원본 열 또는 다른 파생 열
+    compute: Callable           # (의존 열 Series 들) -> 테이블 행 수만큼의 값
+
+# 💡 새 파생 열은 여기에만 추가하면 됩니다. 처음 읽을 때 한 번 계산되고 데이터 버전별로 재사용됩니다.
+DERIVED_COLUMNS = {
+    "Done": DerivedColumn("activities", ("activities.Status",), done_flags),
+    "Completion_Rate": DerivedColumn("master", ("master.Kol_ID", "activities.Kol_ID", "activities.Done"), completion_rate),
+    "Utilization_Rate": DerivedColumn("master", ("master.Spent (USD)", "master.Budget (USD)"), utilization_rate),
+    "YearMonth": DerivedColumn("activities", ("activities.Due_Date",), year_month),
+}
+
+def _check_graph():
+    """모듈 로드 시 의존 열이 모두 정의되어 있고 순환이 없는지 확인합니다."""
+    base = {(table, f.target) for table, schema in SCHEMAS.items() for f in schema.fields}
+    derived = {(spec.table, name) for name, spec in DERIVED_COLUMNS.items()}
+
+    def visit(name, path):
+        if name in path:
+            raise ValueError(f"파생 열 순환 의존: {' -> '.join(path + [name])}")
+        for dep in DERIVED_COLUMNS[name].depends:
+            table, column = dep.split('.', 1)
+            if (table, column) in derived:
+                visit(column, path + [name])
+            elif (table, column) not in base:
+                raise ValueError(f"파생 열 '{name}' 의 의존 열 '{dep}' 이 스키마/파생 열에 없습니다.")
+
+    for name in DERIVED_COLUMNS:
+        visit(name, [])
+
+_check_graph()
+
+# -----------------------------------------------------------------
+# 2. 지연 계산 + 메모 (데이터 버전별)
+# -----------------------------------------------------------------
+
+class DerivedFrames:
+    """
+    원본 (master_df, activities_df) 위에서 파생 열을 처음 요청될 때만 계산하고 기억합니다.
+    페이지는 실제로 읽는 열만 요청하므로, 쓰지 않는 파생 열은 계산하지 않습니다.
+    """
+
+    def __init__(self, master_df, activities_df):
+        self.frames = {"master": master_df, "activities": activities_df}
+        self._computed = {}
+        self._lock = threading.RLock()  # 여러 세션이 같은 객체를 공유 (의존 열 계산 중 재진입 허용)
+
+    def column(self, table, name):
+        if name not in DERIVED_COLUMNS or DERIVED_COLUMNS[name].table != table:
+            return self.frames[table][name]
+        with self._lock:
+            if name not in self._computed:
+                spec = DERIVED_COLUMNS[name]
+                inputs = [self.column(*dep.split('.', 1)) for dep in spec.depends]
+                values = np.asarray(spec.compute(*inputs))
+                self._computed[name] = pd.Series(values, index=self.frames[table].index, name=name)
+            return self._computed[name]
+
+    def frame(self, table, *columns):
+        """원본 테이블에 요청한 파생 열만 붙인 DataFrame 을 반환합니다. (원본은 수정하지 않음)"""
+        return self.frames[table].assign(**{name: self.column(table, name) for name in columns})
+
+    def master(self, *columns):
+        return self.frame("master", *columns)
+
+    def activities(self, *columns):
+        return self.frame("activities", *columns)
+
+@st.cache_resource(max_entries=4)
+def get_derived_frames(data_version, _master_df, _activities_df):
+    """데이터 버전별 DerivedFrames. (_ 로 시작하는 인자는 해시하지 않음 - data_version 이 키)"""
+    return DerivedFrames(_master_df, _activities_df)
@@ -0,0 +1,159 @@
+import pandas as pd
+import numpy as np
+import os
+import threading
+import time
+import re
+import uuid
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import datetime
+from openpyxl import Workbook
+
+# -----------------------------------------------------------------
+# 0. 저장 위치 및 설정
+# -----------------------------------------------------------------
+# 💡 내보낸 파일은 Streamlit 정적 파일 경로(static/)에 써서 디스크에서 바로 내려받게 합니다.
+#    (st.download_button 은 파일 전체를 메모리에 올리므로 대용량에는 쓰지 않음)
+#    .streamlit/config.toml 의 [server] enableStaticServing = true 필요
+
+EXPORT_DIR = os.path.join("static", "exports")
+EXPORT_URL = "app/static/exports"
+EXPORT_FORMATS = {"CSV": "csv", "Parquet": "parquet", "XLSX": "xlsx"}
+CHUNK_ROWS = 20_000            # 한 번에 메모리에 올리는 최대 행 수
+MAX_CONCURRENT_EXPORTS = 2     # 서버 전체 동시 내보내기 수 (나머지는 대기)
+EXPORT_TTL_SECONDS = 6 * 3600  # 이 시간이 지난 내보내기 파일은 새 작업 시작 시 삭제
+XLSX_MAX_ROWS = 1_048_575      # 엑셀 시트 최대 행 수 - 헤더 1행
+
+_export_slots = threading.BoundedSemaphore(MAX_CONCURRENT_EXPORTS)
+
+# -----------------------------------------------------------------
+# 1. 내보낼 행 고르기 (행 위치만 계산, 데이터 복사 없음)
+# -----------------------------------------------------------------
+
+def select_rows(df, positions=None, kol_id=None, alert_mask=None):
+    """
+    내보낼 df 의 행 위치(iloc)를 반환합니다.
+    - positions: 미리 고른 행 위치 (예: KPI 엔진의 기간 인덱스 engine.rows_in). None 이면 전체
+    - kol_id: 해당 KOL 의 행만
+    - alert_mask: (df, positions) 를 받아 알림 대상 여부 bool 배열을 돌려주는 함수 (필요한 열만 읽도록)
+    """
+    positions = np.arange(len(df)) if positions is None else np.asarray(positions)
+    if kol_id is not None:
+        positions = positions[df['Kol_ID'].to_numpy()[positions] == kol_id]
+    if alert_mask is not None and len(positions):
+        positions = positions[np.asarray(alert_mask(df, positions), dtype=bool)]
+    return positions
+
+def _chunks(df, positions):
+    for i in range(0, len(positions), CHUNK_ROWS):
+        yield df.iloc[positions[i:i + CHUNK_ROWS]]
+
+# -----------------------------------------------------------------
+# 2. 형식별 스트리밍 쓰기
+# -----------------------------------------------------------------
+
+def _write_csv(df, positions, path, progress):
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        df.iloc[:0].to_csv(f, index=False)  # 헤더
+        for chunk in _chunks(df, positions):
+            chunk.to_csv(f, header=False, index=False, date_format='%Y-%m-%d')
+            progress(len(chunk))
+
+def _parquet_schema(df):
+    """전체 열 타입으로 스키마를 한 번 정합니다. (빈 object 열은 null 타입이 되므로 문자열로)"""
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            schema = schema.set(i, pa.field(field.name, pa.string()))
+    return schema
+
+def _write_parquet(df, positions, path, progress):
+    schema = _parquet_schema(df)
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in _chunks(df, positions):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            progress(len(chunk))
+
+def _xlsx_value(value):
+    # 💡 openpyxl 은 NaN / NaT 를 쓸 수 없으므로 빈 셀(None)로
+    return None if value is None or value is pd.NaT or (isinstance(value, float) and np.isnan(value)) else value
+
+def _write_xlsx(df, positions, path, progress):
+    if len(positions) > XLSX_MAX_ROWS:
+        raise ValueError(f"엑셀 시트는 최대 {XLSX_MAX_ROWS:,}행까지 가능합니다. ({len(positions):,}행) CSV 또는 Parquet 으로 내보내세요.")
+    workbook = Workbook(write_only=True)  # 행을 바로 파일 버퍼로 흘려 보냄
+    sheet = workbook.create_sheet("export")
+    sheet.append([str(c) for c in df.columns])
+    for chunk in _chunks(df, positions):
+        for row in chunk.itertuples(index=False, name=None):
+            sheet.append([_xlsx_value(v) for v in row])
+        progress(len(chunk))
+    workbook.save(path)
+
+WRITERS = {"csv": _write_csv, "parquet": _write_parquet, "xlsx": _write_xlsx}
+
+# -----------------------------------------------------------------
+# 3. 백그라운드 내보내기 작업
+# -----------------------------------------------------------------
+
+def cleanup_exports(root=EXPORT_DIR, ttl=EXPORT_TTL_SECONDS):
+    """오래된 내보내기 파일과 중단된 임시 파일을 지웁니다."""
+    if not os.path.isdir(root):
+        return
+    cutoff = time.time() - ttl
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+class ExportJob:
+    """
+    다른 세션을 막지 않도록 별도 스레드에서 파일을 씁니다.
+    화면은 status / written / total 을 주기적으로 읽어 진행 상황을 보여 줍니다.
+    """
+
+    def __init__(self, df, positions, fmt, label, root=EXPORT_DIR):
+        self.df, self.positions = df, positions
+        self.ext = EXPORT_FORMATS[fmt]
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        # 💡 정적 경로는 URL 만 알면 누구나 받을 수 있으므로 추측하기 어려운 토큰을 붙임
+        safe_label = re.sub(r'[^0-9A-Za-z_-]+', '_', label).strip('_') or "export"
+        self.file_name = f"{safe_label}-{stamp}-{uuid.uuid4().hex[:12]}.{self.ext}"
+        self.path = os.path.join(root, self.file_name)
+        self.url = f"{EXPORT_URL}/{self.file_name}"
+        self.total, self.written = len(positions), 0
+        self.status, self.error = "대기 중", None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    @property
+    def done(self):
+        return self.status in ("완료", "실패")
+
+    def _progress(self, rows):
+        self.written += rows
+
+    def _run(self):
+        with _export_slots:
+            self.status = "작성 중"
+            tmp_path = f"{self.path}.part"
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                cleanup_exports(os.path.dirname(self.path))
+                WRITERS[self.ext](self.df, self.positions, tmp_path, self._progress)
+                os.replace(tmp_path, self.path)
+                self.status = "완료"
+            except Exception as e:
+                self.error = str(e)
+                self.status = "실패"
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            finally:
+                self.df = None  # 작업이 끝나면 데이터 참조 해제
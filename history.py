@@ -0,0 +1,230 @@
+import streamlit as st
+import pandas as pd
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from kpi_engine import KpiEngine
+
+# -----------------------------------------------------------------
+# 0. 저장 위치 및 설정
+# -----------------------------------------------------------------
+# history/
+#   kpi_index.csv          버전별 KPI 한 줄씩 (추이 차트는 이 파일만 읽음)
+#   status_index.csv       버전별 활동 상태 건수 (long format)
+#   hashes_<table>.parquet 직전 버전의 행 키/해시 (다음 delta 계산용)
+#   hashes_version.txt     해시 파일이 어느 버전 기준인지 (마지막에 기록 -> 다르면 스냅샷에서 다시 계산)
+#   v000001/               버전별 폴더
+#     <table>.parquet            변경/추가된 행만 (체크포인트 버전은 전체 행)
+#     <table>_deleted.parquet    삭제된 행 키
+#     <table>_changed.parquet    (체크포인트 버전만) 변경/추가된 행 키
+
+HISTORY_DIR = "history"
+CHECKPOINT_EVERY = 50  # N 버전마다 전체 스냅샷 저장 -> 과거 복원 시 최대 N 개 delta 만 적용
+TABLE_KEYS = {"master": "Kol_ID", "activities": "Activity_ID"}
+ROW_KEY = "_Row_Key"
+
+KPI_INDEX_FILE = "kpi_index.csv"
+STATUS_INDEX_FILE = "status_index.csv"
+HASHES_VERSION_FILE = "hashes_version.txt"
+
+# -----------------------------------------------------------------
+# 1. 내부 함수 (행 키/해시, 파일 경로)
+# -----------------------------------------------------------------
+
+def _version_dir(root, seq):
+    return os.path.join(root, f"v{seq:06d}")
+
+def is_checkpoint(seq):
+    return seq == 1 or (seq - 1) % CHECKPOINT_EVERY == 0
+
+def _with_row_key(df, key_column):
+    """키 컬럼 + 같은 키 내 순번으로 행 키를 만듭니다. (키가 중복되는 행도 구분)"""
+    keys = df[key_column].astype(str)
+    occurrence = keys.groupby(keys).cumcount().astype(str)
+    return df.assign(**{ROW_KEY: (keys + "#" + occurrence).to_numpy()})
+
+def _row_hashes(df):
+    return pd.util.hash_pandas_object(df.drop(columns=[ROW_KEY]), index=False).to_numpy()
+
+@contextmanager
+def history_lock(root=HISTORY_DIR, timeout=30, stale_after=300):
+    """웹 앱과 알림 스케줄러가 동시에 기록하지 않도록 lock 파일로 직렬화합니다."""
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, ".lock")
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > stale_after:
+                    os.remove(path)  # 비정상 종료로 남은 lock 파일
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"history lock 획득 실패: {path}")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(path)
+
+def last_seq(root=HISTORY_DIR):
+    """KPI 인덱스의 마지막 줄만 읽어 최신 버전 번호를 구합니다. (인덱스가 커져도 O(1))"""
+    path = os.path.join(root, KPI_INDEX_FILE)
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'rb') as f:
+        f.seek(max(os.path.getsize(path) - 4096, 0))
+        last_line = f.read().strip().splitlines()[-1].decode('utf-8')
+    return int(last_line.split(',')[0]) if last_line[:1].isdigit() else 0
+
+# -----------------------------------------------------------------
+# 2. 스냅샷 기록 (변경된 행만 저장)
+# -----------------------------------------------------------------
+
+def record_snapshot(master_df, activities_df, root=HISTORY_DIR, recorded_at=None):
+    """
+    현재 데이터를 직전 버전과 비교해 바뀐 행만 새 버전으로 저장하고 KPI 인덱스에 한 줄 추가합니다.
+    내용이 직전 버전과 같으면 아무것도 저장하지 않고 None 을 반환합니다.
+    """
+    with history_lock(root):
+        return _record_snapshot(master_df, activities_df, root, recorded_at)
+
+def _previous_hashes(root, seq, table, hash_path):
+    """
+    seq 버전의 행 키/해시. 해시 파일이 seq 기준이 아니면 (인덱스 기록 후 해시 교체 전에 중단) 스냅샷을 복원해 다시 계산합니다.
+    기준 버전 기록이 없는 예전 이력은 해시 파일을 그대로 믿습니다.
+    """
+    if seq == 0:
+        return None
+    version_path = os.path.join(root, HASHES_VERSION_FILE)
+    hashes_seq = None
+    if os.path.exists(version_path):
+        with open(version_path, encoding='utf-8') as f:
+            hashes_seq = int(f.read().strip() or 0)
+    if hashes_seq is None or hashes_seq == seq:
+        return pd.read_parquet(hash_path) if os.path.exists(hash_path) else None
+    master, activities = rebuild_snapshot(seq, root, keep_row_key=True)
+    frame = (master if table == "master" else activities).reset_index()
+    return pd.DataFrame({ROW_KEY: frame[ROW_KEY].to_numpy(), "Hash": _row_hashes(frame)})
+
+def _record_snapshot(master_df, activities_df, root, recorded_at):
+    seq = last_seq(root) + 1
+    checkpoint = is_checkpoint(seq)
+
+    deltas = {}
+    for table, df in (("master", master_df), ("activities", activities_df)):
+        keyed = _with_row_key(df, TABLE_KEYS[table])
+        current = pd.DataFrame({ROW_KEY: keyed[ROW_KEY].to_numpy(), "Hash": _row_hashes(keyed)})
+
+        hash_path = os.path.join(root, f"hashes_{table}.parquet")
+        previous = _previous_hashes(root, seq - 1, table, hash_path)
+        previous = current.iloc[:0] if previous is None else previous
+        merged = current.merge(previous, on=ROW_KEY, how="outer", suffixes=("", "_prev"), indicator=True)
+        changed = merged.loc[(merged["_merge"] == "left_only") | ((merged["_merge"] == "both") & (merged["Hash"] != merged["Hash_prev"])), ROW_KEY]
+        deleted = merged.loc[merged["_merge"] == "right_only", [ROW_KEY]]
+
+        rows = keyed if checkpoint else keyed[keyed[ROW_KEY].isin(changed)]
+        deltas[table] = (rows, changed.to_frame(), deleted, current, hash_path)
+
+    changed_rows = sum(len(d[1]) + len(d[2]) for d in deltas.values())
+    if seq > 1 and changed_rows == 0:
+        return None
+
+    # 💡 기록 순서: 버전 폴더(임시 폴더에 쓴 뒤 교체) -> KPI 인덱스 한 줄 (이 줄이 버전 확정) -> 해시 파일
+    #    중간에 멈추면 다음 실행은 같은 버전 번호를 다시 쓰므로, 남은 폴더는 통째로 교체해 이전 시도의 파일이 섞이지 않게 함
+    version_dir = _version_dir(root, seq)
+    tmp_dir = f"{version_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for table, (rows, changed, deleted, current, hash_path) in deltas.items():
+        rows.to_parquet(os.path.join(tmp_dir, f"{table}.parquet"), index=False)
+        if checkpoint:
+            changed.to_parquet(os.path.join(tmp_dir, f"{table}_changed.parquet"), index=False)
+        if not deleted.empty:
+            deleted.to_parquet(os.path.join(tmp_dir, f"{table}_deleted.parquet"), index=False)
+    shutil.rmtree(version_dir, ignore_errors=True)
+    os.replace(tmp_dir, version_dir)
+
+    # --- KPI 인덱스 (추이 조회용, append-only) ---
+    recorded_at = recorded_at or datetime.now()
+    kpis = KpiEngine(master_df, activities_df).kpis()
+    kpi_row = pd.DataFrame([{
+        'Version': seq,
+        'Recorded_At': pd.Timestamp(recorded_at).strftime('%Y-%m-%d %H:%M:%S'),
+        'Checkpoint': int(checkpoint),
+        'Changed_Rows': changed_rows,
+        **kpis,
+    }])
+    status_rows = activities_df['Status'].fillna('(없음)').value_counts().rename_axis('Status').reset_index(name='Count')
+    status_rows.insert(0, 'Version', seq)
+
+    for df, name in ((kpi_row, KPI_INDEX_FILE), (status_rows, STATUS_INDEX_FILE)):
+        path = os.path.join(root, name)
+        df.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+    # --- 다음 delta 계산용 해시 (임시 파일에 쓴 뒤 교체, 마지막에 기준 버전 기록) ---
+    for table, (rows, changed, deleted, current, hash_path) in deltas.items():
+        current.to_parquet(f"{hash_path}.tmp", index=False)
+        os.replace(f"{hash_path}.tmp", hash_path)
+    version_path = os.path.join(root, HASHES_VERSION_FILE)
+    with open(f"{version_path}.tmp", 'w', encoding='utf-8') as f:
+        f.write(str(seq))
+    os.replace(f"{version_path}.tmp", version_path)
+    return seq
+
+# -----------------------------------------------------------------
+# 3. 과거 스냅샷 복원 / KPI 추이 조회
+# -----------------------------------------------------------------
+
+def read_delta(seq, table, root=HISTORY_DIR):
+    """seq 버전에서 추가/변경된 행(ROW_KEY 인덱스)과 삭제된 행 키를 반환합니다."""
+    version_dir = _version_dir(root, seq)
+    rows = pd.read_parquet(os.path.join(version_dir, f"{table}.parquet")).set_index(ROW_KEY)
+    changed_path = os.path.join(version_dir, f"{table}_changed.parquet")
+    if os.path.exists(changed_path):
+        rows = rows.loc[pd.read_parquet(changed_path)[ROW_KEY]]  # 체크포인트 버전: 전체 행 중 바뀐 행만
+    deleted_path = os.path.join(version_dir, f"{table}_deleted.parquet")
+    deleted = pd.Index(pd.read_parquet(deleted_path)[ROW_KEY]) if os.path.exists(deleted_path) else pd.Index([], dtype=object)
+    return rows, deleted
+
+def rebuild_snapshot(seq, root=HISTORY_DIR, keep_row_key=False):
+    """seq 버전 시점의 (master_df, activities_df) 를 직전 체크포인트 + delta 로 복원합니다."""
+    checkpoint = ((seq - 1) // CHECKPOINT_EVERY) * CHECKPOINT_EVERY + 1
+    frames = {}
+    for table in TABLE_KEYS:
+        snapshot = pd.read_parquet(os.path.join(_version_dir(root, checkpoint), f"{table}.parquet")).set_index(ROW_KEY)
+        for v in range(checkpoint + 1, seq + 1):
+            changed, deleted = read_delta(v, table, root)
+            snapshot = pd.concat([snapshot.drop(index=deleted.union(changed.index), errors='ignore'), changed])
+        frames[table] = snapshot if keep_row_key else snapshot.reset_index(drop=True)
+    return frames["master"], frames["activities"]
+
+def _index_mtime(root, name):
+    path = os.path.join(root, name)
+    return os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+@st.cache_data(max_entries=8)
+def _read_index(root, name, mtime):
+    path = os.path.join(root, name)
+    if mtime is None:
+        return pd.DataFrame()
+    return pd.read_csv(path, parse_dates=['Recorded_At'] if name == KPI_INDEX_FILE else None)
+
+def load_kpi_history(root=HISTORY_DIR):
+    """버전별 KPI 추이 (Version, Recorded_At, avg_completion, avg_utilization, ...). 인덱스 파일이 바뀔 때만 다시 읽습니다."""
+    return _read_index(root, KPI_INDEX_FILE, _index_mtime(root, KPI_INDEX_FILE))
+
+def load_status_history(root=HISTORY_DIR):
+    """버전별 활동 상태 건수 추이 (Version, Recorded_At, Status, Count)"""
+    status = _read_index(root, STATUS_INDEX_FILE, _index_mtime(root, STATUS_INDEX_FILE))
+    kpi = load_kpi_history(root)
+    if status.empty or kpi.empty:
+        return status
+    return status.merge(kpi[['Version', 'Recorded_At']], on='Version', how='left')
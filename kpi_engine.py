@@ -0,0 +1,182 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+# -----------------------------------------------------------------
+# 1. 기간별 KPI 엔진 (Due_Date 정렬 + 누적합)
+# -----------------------------------------------------------------
+
+class KpiEngine:
+    """
+    활동을 Due_Date 순으로 정렬해 두고 완료/전체 건수의 누적합(prefix sum)을 저장합니다.
+    임의 기간의 KPI, KOL별 완료율, 기간별 시계열을 searchsorted + 누적합 차이로 계산하므로
+    슬라이더를 움직일 때마다 activities_df 를 다시 스캔하지 않습니다.
+    """
+
+    def __init__(self, master_df, activities_df):
+        self.kol_ids = master_df['Kol_ID'].to_numpy()
+        self.n_kols = len(self.kol_ids)
+        self.n_rows = len(activities_df)
+        self.total_budget = float(master_df['Budget (USD)'].sum())
+        self.total_spent = float(master_df['Spent (USD)'].sum())
+
+        # master_df 에 같은 Kol_ID 가 여러 행 있을 수 있으므로 고유 ID 코드로 집계한 뒤 행 순서로 펼침
+        self.row_codes, unique_ids = pd.factorize(self.kol_ids)
+        self.n_codes = len(unique_ids)
+        codes = pd.Index(unique_ids).get_indexer(activities_df['Kol_ID'])
+        done = (activities_df['Status'] == 'Done').to_numpy()
+        due = activities_df['Due_Date'].to_numpy(dtype='datetime64[ns]')
+        dated = ~np.isnat(due)
+        days = due.astype('datetime64[D]').astype(np.int64)
+
+        # --- 전체 인덱스: 날짜순 정렬 + 완료 건수 누적합 ---
+        dated_rows = np.flatnonzero(dated)
+        order = dated_rows[np.argsort(days[dated_rows], kind='stable')]
+        self.order = order
+        self.days = days[order]
+        self.cum_done = np.concatenate([[0], np.cumsum(done[order])])
+
+        # --- KOL별 인덱스: (KOL 코드, 날짜) 복합 키로 정렬 ---
+        self.day0 = int(self.days[0]) if len(self.days) else 0
+        self.key_span = (int(self.days[-1]) - self.day0 + 2) if len(self.days) else 1
+        known = order[codes[order] >= 0]
+        keys = codes[known].astype(np.int64) * self.key_span + (days[known] - self.day0)
+        key_order = np.argsort(keys, kind='stable')
+        self.kol_keys = keys[key_order]
+        self.kol_cum_done = np.concatenate([[0], np.cumsum(done[known][key_order])])
+
+        # --- 전체 기간(필터 없음) 집계: 날짜가 없는 활동까지 포함 ---
+        self.all_done = np.bincount(codes[codes >= 0], weights=done[codes >= 0], minlength=self.n_codes).astype(np.int64)[self.row_codes]
+        self.all_total = np.bincount(codes[codes >= 0], minlength=self.n_codes)[self.row_codes]
+        self.n_done = int(done.sum())
+
+    # --- 내부: 날짜 -> 정수 일(day) 변환 ---
+    @staticmethod
+    def _to_day(value):
+        return pd.Timestamp(value).to_datetime64().astype('datetime64[D]').astype(np.int64)
+
+    def span(self, start, end):
+        """[start, end] 구간의 정렬 배열 위치 (lo, hi) 를 반환합니다."""
+        lo = 0 if start is None else np.searchsorted(self.days, self._to_day(start), side='left')
+        hi = len(self.days) if end is None else np.searchsorted(self.days, self._to_day(end), side='right')
+        return int(lo), int(max(hi, lo))
+
+    def bounds(self):
+        """날짜가 있는 활동의 최소/최대 Due_Date 를 반환합니다. (없으면 None, None)"""
+        if not len(self.days):
+            return None, None
+        to_date = lambda d: pd.Timestamp(np.datetime64(int(d), 'D')).date()
+        return to_date(self.days[0]), to_date(self.days[-1])
+
+    def rows_in(self, start=None, end=None):
+        """기간 안의 activities_df 행 위치(iloc)를 날짜순으로 반환합니다. 기간이 없으면 원래 순서 그대로 전체를 반환합니다."""
+        if start is None and end is None:
+            return np.arange(self.n_rows)
+        lo, hi = self.span(start, end)
+        return self.order[lo:hi]
+
+    def window_counts(self, start=None, end=None):
+        """기간 안의 (전체 활동 수, 완료 활동 수)"""
+        if start is None and end is None:
+            return self.n_rows, self.n_done
+        lo, hi = self.span(start, end)
+        return hi - lo, int(self.cum_done[hi] - self.cum_done[lo])
+
+    def kol_counts(self, start=None, end=None):
+        """KOL별 (전체, 완료) 활동 수 배열. master_df 행 순서와 같습니다."""
+        if start is None and end is None:
+            return self.all_total, self.all_done
+        codes = self.row_codes.astype(np.int64) * self.key_span
+        lo_day = 0 if start is None else max(self._to_day(start) - self.day0, 0)
+        hi_day = self.key_span - 1 if end is None else min(self._to_day(end) - self.day0, self.key_span - 1)
+        if hi_day < lo_day:
+            empty = np.zeros(self.n_kols, dtype=np.int64)
+            return empty, empty
+        lo = np.searchsorted(self.kol_keys, codes + lo_day, side='left')
+        hi = np.searchsorted(self.kol_keys, codes + hi_day, side='right')
+        return hi - lo, self.kol_cum_done[hi] - self.kol_cum_done[lo]
+
+    def completion_rates(self, start=None, end=None):
+        """KOL별 완료율(%) 배열. 기간 안에 활동이 없으면 0 (기존 fillna(0) 과 동일)"""
+        total, done = self.kol_counts(start, end)
+        rates = np.zeros(self.n_kols, dtype=float)
+        np.divide(done * 100.0, total, out=rates, where=total > 0)
+        return rates
+
+    def kpis(self, start=None, end=None):
+        """
+        Home 화면 KPI 를 계산합니다.
+        예산/지출은 계약 단위 값이므로 기간과 무관하게 전체 합계를 사용합니다.
+        """
+        total, done = self.window_counts(start, end)
+        return {
+            'total_kols': self.n_kols,
+            'total_budget': self.total_budget,
+            'total_spent': self.total_spent,
+            'avg_completion': float(self.completion_rates(start, end).mean()) if self.n_kols else 0.0,
+            'avg_utilization': (self.total_spent / self.total_budget) * 100 if self.total_budget > 0 else 0,
+            'activity_total': total,
+            'activity_done': done,
+        }
+
+    def bucket_counts(self, edges):
+        """
+        정렬된 경계 시각 edges (길이 k+1) 로 나눈 k 개 구간별 (전체, 완료) 건수.
+        구간은 [edges[i], edges[i+1]) 입니다.
+        """
+        edge_days = pd.DatetimeIndex(edges).to_numpy().astype('datetime64[D]').astype(np.int64)
+        pos = np.searchsorted(self.days, edge_days, side='left')
+        return np.diff(pos), np.diff(self.cum_done[pos])
+
+    def period_series(self, start=None, end=None, freq='M'):
+        """기간 안의 시간 단위별 (Period, Total, Done) 시계열. 활동이 없는 구간은 제외합니다. (기본: 월별)"""
+        first, last = self.bounds()
+        empty = pd.DataFrame({'Period': pd.PeriodIndex([], freq=freq), 'Total': pd.Series(dtype=int), 'Done': pd.Series(dtype=int)})
+        if first is None:
+            return empty
+        start = first if start is None else max(pd.Timestamp(start).date(), first)
+        end = last if end is None else min(pd.Timestamp(end).date(), last)
+        if end < start:
+            return empty
+        periods = pd.period_range(start, end, freq=freq)
+        edges = [pd.Timestamp(start)] + list(periods.start_time[1:]) + [pd.Timestamp(end) + pd.Timedelta(days=1)]
+        total, done = self.bucket_counts(edges)
+        series = pd.DataFrame({'Period': periods, 'Total': total, 'Done': done})
+        return series[series['Total'] > 0].reset_index(drop=True)
+
+
+@st.cache_resource(max_entries=4)
+def get_kpi_engine(data_version, _master_df, _activities_df):
+    """데이터 버전별로 KPI 엔진을 한 번만 만들고 모든 세션/페이지에서 공유합니다."""
+    return KpiEngine(_master_df, _activities_df)
+
+# -----------------------------------------------------------------
+# 2. 기간 필터 사이드바 (모든 페이지 공통)
+# -----------------------------------------------------------------
+
+def date_range_sidebar(engine):
+    """
+    사이드바에 마감일 기간 슬라이더를 그리고 (start, end) 를 반환합니다.
+    전체 기간이 선택된 경우 (None, None) 을 반환해 날짜가 없는 활동까지 포함합니다.
+    """
+    first, last = engine.bounds()
+    if first is None or first == last:
+        return None, None
+
+    # 'date_range' 세션 상태로 페이지 간 선택을 기억 (selected_kol 과 동일한 방식)
+    if 'date_range' not in st.session_state:
+        st.session_state.date_range = (first, last)
+    start, end = st.session_state.date_range
+    if not (first <= start <= last and first <= end <= last):
+        st.session_state.date_range = (first, last)
+
+    start, end = st.sidebar.slider(
+        "마감일 기간 (Due Date):",
+        min_value=first,
+        max_value=last,
+        format="YYYY-MM-DD",
+        key='date_range'
+    )
+    if start == first and end == last:
+        return None, None
+    return start, end
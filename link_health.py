@@ -0,0 +1,207 @@
+import streamlit as st
+import pandas as pd
+import argparse
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+# -----------------------------------------------------------------
+# 0. 설정
+# -----------------------------------------------------------------
+MAX_CONCURRENCY = 32       # 전체 동시 요청 수
+PER_HOST_CONCURRENCY = 4   # 호스트별 동시 요청 수
+PER_HOST_INTERVAL = 0.1    # 같은 호스트에 요청을 시작하는 최소 간격 (초)
+REQUEST_TIMEOUT = 5        # 요청 하나의 제한 시간 (초)
+OK_TTL = 6 * 3600          # 정상 링크 결과 유지 시간 (초)
+FAILURE_TTL = 15 * 60      # 실패한 링크는 더 자주 다시 확인
+
+# 표시용 상태
+STATUS_OK = "✅ 정상"
+STATUS_MOVED = "↪️ 이동됨"
+STATUS_NOT_FOUND = "❌ 없음"
+STATUS_ERROR = "⚠️ 오류"
+STATUS_TIMEOUT = "⏱️ 시간 초과"
+STATUS_UNREACHABLE = "🚫 연결 실패"
+STATUS_INVALID = "— 형식 오류"
+STATUS_PENDING = "⏳ 확인 중"
+
+# -----------------------------------------------------------------
+# 1. 링크 하나 확인 (HEAD, 스레드에서 실행)
+# -----------------------------------------------------------------
+
+def _request(url, method, timeout):
+    request = urllib.request.Request(url, method=method, headers={"User-Agent": "kol-dashboard-link-check"})
+    if method == "GET":
+        request.add_header("Range", "bytes=0-0")  # 본문은 받지 않음
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.status, response.geturl()
+
+def probe_link(url, timeout=REQUEST_TIMEOUT):
+    """URL 을 HEAD 로 확인해 (상태, HTTP 코드) 를 반환합니다. HEAD 를 지원하지 않는 서버는 GET 으로 한 번 더 확인."""
+    try:
+        try:
+            code, final_url = _request(url, "HEAD", timeout)
+        except urllib.error.HTTPError as e:
+            if e.code not in (405, 501):
+                raise
+            code, final_url = _request(url, "GET", timeout)
+    except urllib.error.HTTPError as e:
+        return (STATUS_NOT_FOUND if e.code in (404, 410) else STATUS_ERROR), e.code
+    except TimeoutError:
+        return STATUS_TIMEOUT, None
+    except urllib.error.URLError as e:
+        return (STATUS_TIMEOUT if isinstance(e.reason, TimeoutError) else STATUS_UNREACHABLE), None
+    except (OSError, ValueError):
+        return STATUS_UNREACHABLE, None
+    return (STATUS_MOVED if final_url.rstrip('/') != url.rstrip('/') else STATUS_OK), code
+
+def _is_http_url(url):
+    parts = urlsplit(url)
+    return parts.scheme in ("http", "https") and bool(parts.netloc)
+
+def _host(url):
+    return urlsplit(url).netloc.lower()
+
+def _interleave_hosts(urls):
+    """호스트별로 번갈아 가며 나열합니다. (작업 스레드가 한 호스트의 제한을 기다리느라 모두 묶이지 않도록)"""
+    by_host = defaultdict(list)
+    for url in urls:
+        by_host[_host(url)].append(url)
+    queues = list(by_host.values())
+    return [queue[i] for i in range(max(map(len, queues), default=0)) for queue in queues if i < len(queue)]
+
+# -----------------------------------------------------------------
+# 2. 동시 확인 + URL 별 결과 캐시
+# -----------------------------------------------------------------
+
+class LinkHealthChecker:
+    """
+    링크 상태를 URL 별로 TTL 동안 기억합니다.
+    lookup() 은 캐시된 결과를 바로 돌려주고, 없거나 오래된 URL 은 백그라운드에서 모아서 확인합니다.
+    확인은 checker 가 가진 스레드 풀 하나(작업 스레드 수 = 전체 동시 요청 수)에서 실행하고,
+    호스트별 동시 요청 수/시작 간격도 checker 전체에서 공유하므로 여러 배치가 겹쳐도 제한이 지켜집니다.
+    """
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, per_host_concurrency=PER_HOST_CONCURRENCY,
+                 per_host_interval=PER_HOST_INTERVAL, timeout=REQUEST_TIMEOUT, ok_ttl=OK_TTL, failure_ttl=FAILURE_TTL):
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_interval = per_host_interval
+        self.timeout = timeout
+        self.ok_ttl, self.failure_ttl = ok_ttl, failure_ttl
+        self._results = {}    # url -> (상태, HTTP 코드, 확인 시각)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="link-check")
+        self._host_slots = defaultdict(lambda: threading.Semaphore(per_host_concurrency))  # _lock 안에서 생성
+        self._host_next_start = defaultdict(float)  # 호스트별 다음 요청 시작 가능 시각 (time.monotonic, _lock 안에서 갱신)
+
+    def _fresh(self, url, now):
+        result = self._results.get(url)
+        if result is None:
+            return False
+        ttl = self.ok_ttl if result[0] in (STATUS_OK, STATUS_MOVED) else self.failure_ttl
+        return now - result[2] < ttl
+
+    def lookup(self, urls):
+        """
+        urls(Series) 와 같은 인덱스의 상태 Series 를 반환합니다. 빈 링크는 빈 문자열.
+        아직 확인하지 않았거나 TTL 이 지난 URL 은 백그라운드 확인을 시작하고 '확인 중' (또는 이전 결과) 으로 표시합니다.
+        """
+        now = time.monotonic()
+        unique = [u for u in pd.unique(urls.dropna().astype(str).str.strip()) if u]
+        with self._lock:
+            stale = [u for u in unique if _is_http_url(u) and not self._fresh(u, now) and u not in self._pending]
+            self._pending.update(stale)
+            statuses = {}
+            for u in unique:
+                if not _is_http_url(u):
+                    statuses[u] = STATUS_INVALID
+                elif u in self._results:
+                    statuses[u] = self._results[u][0]
+                else:
+                    statuses[u] = STATUS_PENDING
+        if stale:
+            threading.Thread(target=self.check, args=(stale,), daemon=True).start()
+        return urls.astype(object).where(urls.notna(), '').astype(str).str.strip().map(lambda u: statuses.get(u, ''))
+
+    def pending_count(self, urls=None):
+        with self._lock:
+            if urls is None:
+                return len(self._pending)
+            return sum(1 for u in pd.unique(urls.dropna().astype(str).str.strip()) if u in self._pending)
+
+    def check(self, urls):
+        """urls 를 지금 확인해 캐시에 저장하고 {url: (상태, HTTP 코드)} 를 반환합니다. (호출한 스레드에서 끝날 때까지 대기)"""
+        urls = list(urls)
+        try:
+            futures = {url: self._executor.submit(self._check_one, url) for url in _interleave_hosts(dict.fromkeys(urls))}
+            return {url: futures[url].result() for url in urls}
+        finally:
+            with self._lock:
+                self._pending.difference_update(urls)
+
+    def _check_one(self, url):
+        """호스트별 제한(동시 요청 수/시작 간격)을 지키며 probe_link 를 실행하고 결과를 캐시에 저장합니다. (작업 스레드에서 실행)"""
+        host = _host(url)
+        with self._lock:
+            host_slot = self._host_slots[host]
+        with host_slot:
+            # 💡 호스트별 요청 시작 간격 유지 (다른 배치와 함께 예약 시각을 먼저 잡고 기다림)
+            with self._lock:
+                now = time.monotonic()
+                start_at = max(now, self._host_next_start[host])
+                self._host_next_start[host] = start_at + self.per_host_interval
+            if start_at > now:
+                time.sleep(start_at - now)
+            status, code = probe_link(url, self.timeout)
+        with self._lock:
+            self._results[url] = (status, code, time.monotonic())
+        return status, code
+
+def with_link_status(df, checker, column='File_Link'):
+    """df 의 링크 열 바로 오른쪽에 Link_Status 열을 붙인 사본을 반환합니다."""
+    if column not in df.columns:
+        return df
+    df = df.copy()
+    df.insert(df.columns.get_loc(column) + 1, 'Link_Status', checker.lookup(df[column]).to_numpy())
+    return df
+
+@st.cache_resource
+def get_link_checker():
+    """모든 세션이 같은 결과 캐시를 공유합니다."""
+    return LinkHealthChecker()
+
+# -----------------------------------------------------------------
+# 3. 명령행 확인 (예: python link_health.py http://127.0.0.1:8000/a.pdf ...)
+# -----------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="File_Link 상태 확인")
+    parser.add_argument("urls", nargs="*", help="확인할 URL (없으면 원본 데이터의 File_Link 전체)")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--per-host", type=int, default=PER_HOST_CONCURRENCY)
+    parser.add_argument("--interval", type=float, default=PER_HOST_INTERVAL)
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT)
+    args = parser.parse_args(argv)
+
+    urls = args.urls
+    if not urls:
+        from utils import read_source_frames
+        _, activities_df = read_source_frames()
+        urls = [u for u in activities_df['File_Link'].dropna().astype(str).str.strip().unique() if _is_http_url(u)]
+
+    checker = LinkHealthChecker(args.concurrency, args.per_host, args.interval, args.timeout)
+    started = time.monotonic()
+    results = checker.check(urls)
+    for url in urls:
+        status, code = results[url]
+        print(f"{status}\t{code or '-'}\t{url}")
+    print(f"{len(urls)}개 확인, {time.monotonic() - started:.1f}초")
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,20 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 from datetime import datetime, timedelta 
-from utils import load_data_from_gsheet, get_max_value # 💡 공용 함수 임포트
+from utils import load_dashboard_data, get_max_value, get_crossfilter_cubes, lttb_downsample, TIME_BUCKET_LABELS, NO_PERIOD # 💡 공용 함수 임포트
+from kpi_engine import get_kpi_engine, date_range_sidebar
+from rankings import get_kol_ranking, RANKING_METRICS
+from derived import get_derived_frames
+from history import load_kpi_history, load_status_history
 
 st.set_page_config(page_title="차트 대시보드", layout="wide")
 st.title("📈 2. 주요 차트 현황")
 
-master_df, activities_df = load_data_from_gsheet()
+master_df, activities_df, data_version = load_dashboard_data()
+
+# 💡 3단 레이아웃 한 칸(약 400px) 기준으로 점/막대 사이 간격이 6px 이상이 되도록 제한
+CHART_MAX_POINTS = 60
+CROSSFILTER_WIDTH, CROSSFILTER_HEIGHT = 360, 300  # 교차 필터 차트 한 칸 크기 (3칸 x 2줄)
 
 # -----------------------------------------------------------------
 # 1. 차트 UI
@@ -17,128 +25,187 @@ if master_df is not None and activities_df is not None:
     # st.session_state.selected_kol은 1_Home.py의 사이드바에서 설정됨
     selected_name = st.session_state.get('selected_kol', "전체")
 
+    # 💡 기간 필터 (모든 페이지 공통): 기간 안의 활동 행은 엔진의 정렬 인덱스로 바로 잘라냄
+    engine = get_kpi_engine(data_version, master_df, activities_df)
+    start_date, end_date = date_range_sidebar(engine)
+    derived = get_derived_frames(data_version, master_df, activities_df)  # 💡 파생 열은 기간 필터 전 전체 활동 기준, 요청 시 계산
+    cubes = get_crossfilter_cubes(data_version, engine, master_df, activities_df)  # 💡 교차 필터 집계도 전체 활동 기준, 기간은 window() 에서 적용
+    activities_df = activities_df.iloc[engine.rows_in(start_date, end_date)]
+
     if selected_name == "전체":
         
-        # --- 축 최대값 계산 ---
-        max_count = get_max_value(activities_df.groupby('YearMonth').size().reset_index(name='Count'), 'Count')
-        max_budget = get_max_value(master_df.groupby('Country')['Budget (USD)'].sum().reset_index(name='Total_Budget'), 'Total_Budget')
-        
+        # --- 시계열 차트 시간 단위 (줌 레벨) ---
+        bucket_label = st.sidebar.select_slider("시계열 차트 시간 단위", options=list(TIME_BUCKET_LABELS), value="자동")
+        bucket_freq = TIME_BUCKET_LABELS[bucket_label]
+
         # -----------------------------------
-        # Row 1: 차트 3개 (파이차트, 파이차트, 혼합 세로 막대+선)
+        # Row 1~2: 교차 필터 차트 6개 (하나의 Vega-Lite 차트로 묶어 선택을 공유)
+        # 💡 사전 집계 표만 한 번 보내고, 클릭 필터링은 브라우저에서 처리 -> Streamlit 재실행 없음
         # -----------------------------------
-        col_r1_c1, col_r1_c2, col_r1_c3 = st.columns(3)
+        activity_cube, kol_cube, period_labels = cubes.window(CHART_MAX_POINTS, freq=bucket_freq, start=start_date, end=end_date)
+        st.caption("💡 상태 조각 / 기간 막대 / 국가 막대를 클릭하면 다른 차트가 바로 필터링됩니다. (Shift+클릭: 여러 개 선택, 더블클릭: 선택 해제)")
 
-        with col_r1_c1:
-            st.subheader("활동 상태별 분포")
-            status_counts = activities_df['Status'].value_counts().reset_index()
-            status_counts.columns = ['Status', 'Count']
-            
-            base = alt.Chart(status_counts).encode(theta=alt.Theta("Count", stack=True), color=alt.Color("Status", title='상태'))
-            pie = base.mark_arc(outerRadius=100, innerRadius=60).encode(tooltip=['Status', alt.Tooltip('Count', title='활동 건수', format='d')])
-            text_labels = base.mark_text(radius=120, fill='black', fontSize=14).encode( 
-                text=alt.Text('Count', format='d'),
-                order=alt.Order('Count', sort='descending')
+        status_sel = alt.selection_point(fields=['Status'], name='status_sel')
+        period_sel = alt.selection_point(fields=['Period'], name='period_sel')
+        country_sel = alt.selection_point(fields=['Country'], name='country_sel')
+
+        def filtered(data, *selections):
+            """다른 차트의 선택으로 필터링한 기본 차트 (자기 차트의 선택은 강조 표시에만 사용)"""
+            chart = alt.Chart(data)
+            for selection in selections:
+                chart = chart.transform_filter(selection)
+            return chart
+
+        def donut(data, selections, category, value, title, legend_title, value_title, param=None):
+            base = filtered(data, *selections).transform_aggregate(Count=f'sum({value})', groupby=[category]).encode(
+                theta=alt.Theta('Count:Q', stack=True), color=alt.Color(f'{category}:N', title=legend_title)
             )
-            chart1 = (pie + text_labels).interactive()
-            st.altair_chart(chart1, use_container_width=True)
-        
-        with col_r1_c2:
-            st.subheader("KOL 등급별 분포")
-            type_counts = master_df['KOL_Type'].value_counts().reset_index()
-            type_counts.columns = ['Type', 'Count']
-            
-            base = alt.Chart(type_counts).encode(theta=alt.Theta("Count", stack=True), color=alt.Color("Type", title='등급'))
-            pie = base.mark_arc(outerRadius=100, innerRadius=60).encode(tooltip=['Type', alt.Tooltip('Count', title='KOL 건수', format='d')])
+            pie = base.mark_arc(outerRadius=100, innerRadius=60).encode(tooltip=[f'{category}:N', alt.Tooltip('Count:Q', title=value_title, format='d')])
+            if param is not None:
+                pie = pie.add_params(param).encode(opacity=alt.condition(param, alt.value(1), alt.value(0.3)))
             text_labels = base.mark_text(radius=120, fill='black', fontSize=14).encode(
-                text=alt.Text('Count', format='d'),
-                order=alt.Order('Count', sort='descending')
+                text=alt.Text('Count:Q', format='d'),
+                order=alt.Order('Count:Q', sort='descending')
             )
-            chart2 = (pie + text_labels).interactive()
-            st.altair_chart(chart2, use_container_width=True)
-                
-        with col_r1_c3:
-            st.subheader("월별 총 활동 스케줄")
-            timeline_data = activities_df.groupby('YearMonth').size().reset_index(name='Count')
-            
-            bar_chart = alt.Chart(timeline_data).mark_bar(color='#4c78a8').encode(
-                x=alt.X('YearMonth', title='월별 마감일', sort=timeline_data['YearMonth'].tolist()),
-                y=alt.Y('Count', title='활동 건수 (건)', axis=alt.Axis(format='d'), scale=alt.Scale(domain=[0, max_count])), 
-                tooltip=['YearMonth', alt.Tooltip('Count', title='활동 건수', format='d')]
-            )
-            text_bar = bar_chart.mark_text(align='center', baseline='bottom', dy=-5, color='black').encode(text=alt.Text('Count', format='d'))
-            line_chart = alt.Chart(timeline_data).mark_line(point=True, color='red').encode(
-                x=alt.X('YearMonth'), y=alt.Y('Count'), tooltip=['YearMonth', alt.Tooltip('Count', title='활동 건수', format='d')]
-            )
-            chart3 = (bar_chart + text_bar + line_chart).interactive()
-            st.altair_chart(chart3, use_container_width=True)
+            return alt.layer(pie, text_labels, title=title).properties(width=CROSSFILTER_WIDTH, height=CROSSFILTER_HEIGHT)
 
-        st.divider()
+        # 1) 활동 상태별 분포 (선택: Status / 필터: 국가, 기간)
+        chart1 = donut(activity_cube, [country_sel, period_sel], 'Status', 'Count', "활동 상태별 분포", '상태', '활동 건수', param=status_sel)
 
-        # -----------------------------------
-        # Row 2: 차트 3개 (꺾은선, 혼합 차트 분리, 세로 막대)
-        # -----------------------------------
-        col_r2_c1, col_r2_c2, col_r2_c3 = st.columns(3)
-
-        with col_r2_c1:
-            st.subheader("월별 완료 활동 트렌드")
-            completed_df = activities_df[activities_df['Status'] == 'Done'].copy()
-            completed_timeline = completed_df.groupby('YearMonth').size().reset_index(name='Completed')
-            max_completed = get_max_value(completed_timeline, 'Completed')
-            line = alt.Chart(completed_timeline).mark_line(point=True, color='green').encode(
-                x=alt.X('YearMonth', title='월별 완료 시점', sort=completed_timeline['YearMonth'].tolist()),
-                y=alt.Y('Completed', title='완료된 활동 건수 (건)', axis=alt.Axis(format='d'), scale=alt.Scale(domain=[0, max_completed])), 
-                tooltip=['YearMonth', alt.Tooltip('Completed', title='완료된 활동 건수', format='d')]
-            )
-            text_line = line.mark_text(align='left', baseline='middle', dx=5, color='green').encode(text=alt.Text('Completed', format='d'))
-            chart4 = (line + text_line).interactive()
-            st.altair_chart(chart4, use_container_width=True)
-
-        with col_r2_c2:
-            st.subheader("국가별 총 예산 (USD)") 
-            country_summary = master_df.groupby('Country').agg(Total_Budget=('Budget (USD)', 'sum')).reset_index()
-            max_budget_single = get_max_value(country_summary, 'Total_Budget')
-            bar = alt.Chart(country_summary).mark_bar().encode(
-                x=alt.X('Total_Budget', title='총 예산 (USD)', axis=alt.Axis(format='$,.0f'), scale=alt.Scale(domain=[0, max_budget_single])), 
-                y=alt.Y('Country', title='국가', sort='-x'),
-                tooltip=['Country', alt.Tooltip('Total_Budget', title='총 예산', format='$,.0f')]
-            )
-            text_bar = bar.mark_text(align='left', baseline='middle', dx=5, color='black').encode(text=alt.Text('Total_Budget', format='$,.0f'))
-            st.altair_chart(bar + text_bar, use_container_width=True)
-        
-        with col_r2_c3:
-            st.subheader("활동 유형별 분포")
-            type_counts = activities_df['Activity_Type'].value_counts().reset_index()
-            type_counts.columns = ['Type', 'Count']
-            max_type_count = get_max_value(type_counts, 'Count')
-            bar = alt.Chart(type_counts).mark_bar().encode(
-                x=alt.X('Type', title='활동 유형'), 
-                y=alt.Y('Count', title='활동 건수 (건)', axis=alt.Axis(format='d'), scale=alt.Scale(domain=[0, max_type_count])), 
-                tooltip=['Type', alt.Tooltip('Count', title='활동 건수', format='d')]
-            )
-            text_bar = bar.mark_text(align='center', baseline='bottom', dy=-5, color='black').encode(text=alt.Text('Count', format='d'))
-            chart6 = (bar + text_bar).interactive()
-            st.altair_chart(chart6, use_container_width=True)
+        # 2) KOL 등급별 분포 (필터: 국가)
+        chart2 = donut(kol_cube, [country_sel], 'KOL_Type', 'KOLs', "KOL 등급별 분포", '등급', 'KOL 건수')
+
+        # 3) 기간별 총 활동 스케줄 (선택: Period / 필터: 상태, 국가)
+        timeline = filtered(activity_cube, status_sel, country_sel).transform_filter(alt.datum.Period != NO_PERIOD) \
+            .transform_aggregate(Count='sum(Count)', groupby=['Period'])
+        x_period = alt.X('Period:N', title='기간별 마감일', sort=period_labels)
+        bar_chart = timeline.mark_bar(color='#4c78a8').encode(
+            x=x_period,
+            y=alt.Y('Count:Q', title='활동 건수 (건)', axis=alt.Axis(format='d')),
+            opacity=alt.condition(period_sel, alt.value(1), alt.value(0.3)),
+            tooltip=['Period:N', alt.Tooltip('Count:Q', title='활동 건수', format='d')]
+        ).add_params(period_sel)
+        text_bar = timeline.mark_text(align='center', baseline='bottom', dy=-5, color='black').encode(x=x_period, y='Count:Q', text=alt.Text('Count:Q', format='d'))
+        line_chart = timeline.mark_line(point=True, color='red').encode(x=x_period, y='Count:Q')
+        chart3 = alt.layer(bar_chart, text_bar, line_chart, title="기간별 총 활동 스케줄").properties(width=CROSSFILTER_WIDTH, height=CROSSFILTER_HEIGHT)
+
+        # 4) 기간별 완료 활동 트렌드 (필터: 국가, 강조: 선택 기간)
+        completed = filtered(activity_cube, country_sel).transform_filter(alt.datum.Period != NO_PERIOD) \
+            .transform_aggregate(Completed='sum(Done)', groupby=['Period'])
+        line = completed.mark_line(point=True, color='green').encode(
+            x=alt.X('Period:N', title='기간별 완료 시점', sort=period_labels),
+            y=alt.Y('Completed:Q', title='완료된 활동 건수 (건)', axis=alt.Axis(format='d')),
+            tooltip=['Period:N', alt.Tooltip('Completed:Q', title='완료된 활동 건수', format='d')]
+        )
+        text_line = line.mark_text(align='left', baseline='middle', dx=5, color='green').encode(text=alt.Text('Completed:Q', format='d'))
+        chart4 = alt.layer(line, text_line, title="기간별 완료 활동 트렌드").properties(width=CROSSFILTER_WIDTH, height=CROSSFILTER_HEIGHT)
+
+        # 5) 국가별 총 예산 (선택: Country)
+        budget = filtered(kol_cube).transform_aggregate(Total_Budget='sum(Budget)', groupby=['Country'])
+        bar = budget.mark_bar().encode(
+            x=alt.X('Total_Budget:Q', title='총 예산 (USD)', axis=alt.Axis(format='$,.0f')),
+            y=alt.Y('Country:N', title='국가', sort='-x'),
+            opacity=alt.condition(country_sel, alt.value(1), alt.value(0.3)),
+            tooltip=['Country:N', alt.Tooltip('Total_Budget:Q', title='총 예산', format='$,.0f')]
+        ).add_params(country_sel)
+        text_bar = budget.mark_text(align='left', baseline='middle', dx=5, color='black').encode(
+            x='Total_Budget:Q', y=alt.Y('Country:N', sort='-x'), text=alt.Text('Total_Budget:Q', format='$,.0f')
+        )
+        chart5 = alt.layer(bar, text_bar, title="국가별 총 예산 (USD)").properties(width=CROSSFILTER_WIDTH, height=CROSSFILTER_HEIGHT)
+
+        # 6) 활동 유형별 분포 (필터: 상태, 국가, 기간)
+        types = filtered(activity_cube, status_sel, country_sel, period_sel).transform_aggregate(Count='sum(Count)', groupby=['Activity_Type'])
+        bar = types.mark_bar().encode(
+            x=alt.X('Activity_Type:N', title='활동 유형'),
+            y=alt.Y('Count:Q', title='활동 건수 (건)', axis=alt.Axis(format='d')),
+            tooltip=[alt.Tooltip('Activity_Type:N', title='활동 유형'), alt.Tooltip('Count:Q', title='활동 건수', format='d')]
+        )
+        text_bar = bar.mark_text(align='center', baseline='bottom', dy=-5, color='black').encode(text=alt.Text('Count:Q', format='d'))
+        chart6 = alt.layer(bar, text_bar, title="활동 유형별 분포").properties(width=CROSSFILTER_WIDTH, height=CROSSFILTER_HEIGHT)
+
+        crossfilter_chart = alt.vconcat(
+            alt.hconcat(chart1, chart2, chart3),
+            alt.hconcat(chart4, chart5, chart6),
+        ).resolve_scale(color='independent')
+        st.altair_chart(crossfilter_chart, use_container_width=False)
 
         st.divider()
 
         # -----------------------------------
         # Row 3: 새로운 차트 - 우수 KOL 순위 (세로 막대, 폭 자동)
         # -----------------------------------
-        st.subheader("🏆 우수 KOL별 완료율 순위 (Top 10)")
-        
-        top_kols = master_df.sort_values(by='Completion_Rate', ascending=False).head(10).reset_index(drop=True)
-        max_completion = get_max_value(top_kols, 'Completion_Rate', is_percentage=True)
+        ranking = get_kol_ranking(data_version, master_df, engine, derived)
+
+        col_rank1, col_rank2, col_rank3, col_rank4 = st.columns(4)
+        with col_rank1: metric_label = st.selectbox("순위 기준", list(RANKING_METRICS))
+        with col_rank2: top_n = st.number_input("표시 인원 (Top N)", min_value=1, max_value=100, value=10)
+        with col_rank3: rank_countries = st.multiselect("국가", ranking.country_options)
+        with col_rank4: rank_types = st.multiselect("KOL 등급", ranking.type_options)
+
+        metric_col, metric_title, metric_format, is_percentage = RANKING_METRICS[metric_label]
+        st.subheader(f"🏆 우수 KOL별 {metric_label} 순위 (Top {top_n})")
+
+        # 💡 기간 필터가 걸리면 완료율/활동 건수가 달라지므로 사전 정렬 대신 부분 선택으로 계산
+        window_values = None
+        if start_date is not None or end_date is not None:
+            if metric_col == 'Completion_Rate':
+                window_values = engine.completion_rates(start_date, end_date)
+            elif metric_col == 'Activity_Count':
+                window_values = engine.kol_counts(start_date, end_date)[0].astype(float)
+        top_pos = ranking.top(metric_col, top_n, rank_countries, rank_types, values=window_values)
+        values = ranking.values[metric_col] if window_values is None else window_values
+
+        top_kols = pd.DataFrame({'Name': master_df['Name'].to_numpy()[top_pos], 'Value': values[top_pos]})
+        max_value = get_max_value(top_kols, 'Value', is_percentage=is_percentage)
         
         bar = alt.Chart(top_kols).mark_bar().encode(
             x=alt.X('Name', title='KOL 이름', sort='-y'), 
-            y=alt.Y('Completion_Rate', title='활동 완료율 (%)', axis=alt.Axis(format='.1f'), scale=alt.Scale(domain=[0, max_completion])), 
-            color=alt.Color('Completion_Rate', title='완료율 (%)', scale=alt.Scale(range='heatmap')),
-            tooltip=['Name', alt.Tooltip('Completion_Rate', title='완료율', format='.1f')]
+            y=alt.Y('Value', title=metric_title, axis=alt.Axis(format=metric_format), scale=alt.Scale(domain=[0, max_value])), 
+            color=alt.Color('Value', title=metric_label, scale=alt.Scale(range='heatmap')),
+            tooltip=['Name', alt.Tooltip('Value', title=metric_label, format=metric_format)]
         )
-        text_bar = bar.mark_text(align='center', baseline='bottom', dy=-5, color='black').encode(text=alt.Text('Completion_Rate', format='.1f'))
+        text_bar = bar.mark_text(align='center', baseline='bottom', dy=-5, color='black').encode(text=alt.Text('Value', format=metric_format))
         chart7 = (bar + text_bar).interactive()
         st.altair_chart(chart7, use_container_width=True)
 
+        st.divider()
+
+        # -----------------------------------
+        # Row 4: KPI 추이 (데이터 버전별 스냅샷 이력)
+        # -----------------------------------
+        kpi_history = load_kpi_history()
+        if len(kpi_history) > 1:
+            col_r4_c1, col_r4_c2 = st.columns(2)
+            history_max_points = CHART_MAX_POINTS * 3 // 2  # 2단 레이아웃 한 칸 기준
+
+            with col_r4_c1:
+                st.subheader("완료율 / 예산 활용률 추이")
+                trend_frames = []
+                for column, label in (('avg_completion', '평균 완료율'), ('avg_utilization', '예산 활용률')):
+                    keep = lttb_downsample(kpi_history['Recorded_At'].to_numpy().astype('int64'), kpi_history[column].to_numpy(), history_max_points)
+                    trend_frames.append(pd.DataFrame({'Recorded_At': kpi_history['Recorded_At'].to_numpy()[keep], 'KPI': label, 'Rate': kpi_history[column].to_numpy()[keep]}))
+                kpi_trend = pd.concat(trend_frames, ignore_index=True)
+                chart8 = alt.Chart(kpi_trend).mark_line(point=True).encode(
+                    x=alt.X('Recorded_At', title='기록 시점'),
+                    y=alt.Y('Rate', title='비율 (%)', axis=alt.Axis(format='.1f'), scale=alt.Scale(domain=[0, 100])),
+                    color=alt.Color('KPI', title='KPI'),
+                    tooltip=[alt.Tooltip('Recorded_At', title='기록 시점'), 'KPI', alt.Tooltip('Rate', title='비율', format='.1f')]
+                ).interactive()
+                st.altair_chart(chart8, use_container_width=True)
+
+            with col_r4_c2:
+                st.subheader("활동 상태별 건수 추이")
+                status_history = load_status_history()
+                sampled_versions = kpi_history['Version'].iloc[lttb_downsample(kpi_history['Recorded_At'].to_numpy().astype('int64'), kpi_history['activity_total'].to_numpy(), history_max_points)]
+                status_history = status_history[status_history['Version'].isin(sampled_versions)]
+                chart9 = alt.Chart(status_history).mark_area().encode(
+                    x=alt.X('Recorded_At', title='기록 시점'),
+                    y=alt.Y('Count', title='활동 건수 (건)', axis=alt.Axis(format='d'), stack=True),
+                    color=alt.Color('Status', title='상태'),
+                    tooltip=[alt.Tooltip('Recorded_At', title='기록 시점'), 'Status', alt.Tooltip('Count', title='활동 건수', format='d')]
+                ).interactive()
+                st.altair_chart(chart9, use_container_width=True)
+
     else:
         # --- (KOL 상세 뷰) ---
         st.header(f"👨‍⚕️ {selected_name} 님 차트 요약")
@@ -1,12 +1,16 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from utils import load_data_from_csv, highlight_master_row, highlight_activity_row # 💡 공용 함수 임포트 이름 변경
+from utils import load_dashboard_data, highlight_master_row, highlight_activity_row, is_activity_overdue, is_contract_imminent # 💡 공용 함수 임포트 이름 변경
+from kpi_engine import get_kpi_engine, date_range_sidebar
+from derived import get_derived_frames
+from export import ExportJob, EXPORT_FORMATS, select_rows
+from link_health import get_link_checker, with_link_status
 
 st.set_page_config(page_title="원본 데이터", layout="wide")
 st.title("🗃️ 3. 원본 데이터 (Raw Data)")
 
-master_df, activities_df = load_data_from_csv() # 💡 함수 이름 변경
+master_df, activities_df, data_version = load_dashboard_data() # 💡 선택한 지역 파티션만 로드
 
 # -----------------------------------------------------------------
 # 1. 원본 데이터 UI
@@ -15,6 +19,15 @@ if master_df is not None and activities_df is not None:
 
     # st.session_state.selected_kol은 1_Home.py의 사이드바에서 설정됨
     selected_name = st.session_state.get('selected_kol', "전체")
+
+    # 💡 기간 필터 (모든 페이지 공통)
+    engine = get_kpi_engine(data_version, master_df, activities_df)
+    start_date, end_date = date_range_sidebar(engine)
+
+    # 💡 이 페이지에서 보여 주는 파생 열만 계산 (데이터 버전별로 한 번, 기간 필터 전 전체 활동 기준)
+    master_df = get_derived_frames(data_version, master_df, activities_df).master('Completion_Rate', 'Utilization_Rate')
+    all_activities_df = activities_df  # 내보내기용 (기간 필터는 행 위치로 적용)
+    activities_df = activities_df.iloc[engine.rows_in(start_date, end_date)]
     
     today = datetime.now() 
 
@@ -35,27 +48,88 @@ if master_df is not None and activities_df is not None:
     st.divider()
 
     st.subheader("모든 활동 내역 (KOL Activities)")
+    # 💡 링크 상태는 URL 별로 캐시되며, 처음 보는 링크는 백그라운드에서 동시에 확인
+    link_checker = get_link_checker()
+    link_column_config = {
+        "File_Link": st.column_config.LinkColumn(
+            "자료 열람 (링크)",
+            display_text="🔗 링크 열기"
+        ),
+        "Link_Status": st.column_config.TextColumn("링크 상태"),
+    }
     if selected_name == "전체":
+        shown_activities_df = activities_df
         st.dataframe(
-            activities_df.style.apply(highlight_activity_row, today=today, axis=1).format({'Due_Date': lambda x: x.strftime('%Y-%m-%d') if pd.notnull(x) else ''}),
+            with_link_status(shown_activities_df, link_checker).style.apply(highlight_activity_row, today=today, axis=1).format({'Due_Date': lambda x: x.strftime('%Y-%m-%d') if pd.notnull(x) else ''}),
+            column_config=link_column_config,
             use_container_width=True
         )
     else:
         # 선택된 KOL만 필터링
         selected_kol_id = master_df[master_df['Name'] == selected_name]['Kol_ID'].iloc[0]
-        selected_activities_df = activities_df[activities_df['Kol_ID'] == selected_kol_id]
+        shown_activities_df = activities_df[activities_df['Kol_ID'] == selected_kol_id]
         st.dataframe(
-            selected_activities_df.style.apply(highlight_activity_row, today=today, axis=1).format({'Due_Date': lambda x: x.strftime('%Y-%m-%d') if pd.notnull(x) else ''}),
-            column_config={
-                "File_Link": None, 
-                "자료 열람": st.column_config.LinkColumn(
-                    "자료 열람 (링크)",
-                    display_text="🔗 링크 열기"
-                )
-            },
+            with_link_status(shown_activities_df, link_checker).style.apply(highlight_activity_row, today=today, axis=1).format({'Due_Date': lambda x: x.strftime('%Y-%m-%d') if pd.notnull(x) else ''}),
+            column_config=link_column_config,
             use_container_width=True,
             hide_index=True
         )
-        
+
+    if 'File_Link' in shown_activities_df.columns and link_checker.pending_count(shown_activities_df['File_Link']):
+        # 💡 확인이 끝날 때까지 안내 문구만 2초마다 갱신하고, 끝나면 한 번 다시 실행해 표에 반영
+        @st.fragment(run_every=2)
+        def link_check_progress():
+            remaining = link_checker.pending_count(shown_activities_df['File_Link'])
+            if remaining == 0:
+                st.rerun()
+            st.caption(f"⏳ 링크 {remaining:,}개 확인 중...")
+        link_check_progress()
+
+    # -----------------------------------------------------------------
+    # 2. 현재 보기 내보내기 (CSV / Parquet / XLSX)
+    # -----------------------------------------------------------------
+    st.divider()
+    st.subheader("📤 내보내기")
+    st.caption("화면에 보이는 범위와 상관없이 현재 필터(지역, KOL, 기간)의 전체 행을 파일로 내보냅니다. 큰 파일은 백그라운드에서 작성됩니다.")
+
+    col_ex1, col_ex2, col_ex3 = st.columns(3)
+    with col_ex1: export_table = st.radio("대상", ["활동 내역", "KOL 마스터"], horizontal=True)
+    with col_ex2: export_format = st.radio("형식", list(EXPORT_FORMATS), horizontal=True)
+    with col_ex3: alerts_only = st.checkbox("알림 대상만", help="활동 내역: 마감 지연 활동 / KOL 마스터: 계약 만료 임박 KOL")
+
+    export_kol_id = None if selected_name == "전체" else master_df.loc[master_df['Name'] == selected_name, 'Kol_ID'].iloc[0]
+    if export_table == "활동 내역":
+        export_df = all_activities_df
+        export_rows = select_rows(
+            export_df, engine.rows_in(start_date, end_date), export_kol_id,
+            (lambda df, pos: is_activity_overdue(df['Due_Date'].iloc[pos], df['Status'].iloc[pos], today)) if alerts_only else None,
+        )
+    else:
+        export_df = master_df  # 💡 KOL 마스터에는 기간 필터를 적용하지 않음
+        export_rows = select_rows(
+            export_df, None, export_kol_id,
+            (lambda df, pos: is_contract_imminent(df['Contract_End'].iloc[pos], today)) if alerts_only else None,
+        )
+
+    label = "_".join(filter(None, ["activities" if export_table == "활동 내역" else "contracts", export_kol_id, "alerts" if alerts_only else None]))
+    if st.button(f"내보내기 시작 ({len(export_rows):,}행)", disabled=len(export_rows) == 0):
+        st.session_state['export_job'] = ExportJob(export_df, export_rows, export_format, label).start()
+
+    job = st.session_state.get('export_job')
+    if job is not None:
+        # 💡 진행 상황만 1초마다 다시 그림 (페이지 전체는 다시 실행하지 않음)
+        polling = not job.done
+        @st.fragment(run_every=1 if polling else None)
+        def export_status():
+            if polling and job.done:
+                st.rerun()  # 끝나면 전체를 한 번 다시 실행해 주기적 갱신을 멈춤
+            if job.status == "완료":
+                st.markdown(f'✅ <a href="{job.url}" download="{job.file_name}">{job.file_name} 다운로드</a> ({job.total:,}행)', unsafe_allow_html=True)
+            elif job.status == "실패":
+                st.error(f"내보내기 실패: {job.error}")
+            else:
+                st.progress(job.written / job.total if job.total else 0.0, text=f"{job.status}... {job.written:,} / {job.total:,}행")
+        export_status()
+
 else:
     st.error("데이터를 불러오는 데 실패했습니다. '1_Home' 페이지에서 연결을 확인하세요.")
\ No newline at end of file
@@ -0,0 +1,209 @@
+import pandas as pd
+import json
+import os
+import shutil
+import threading
+import uuid
+from derived import completion_rate, done_flags
+
+# -----------------------------------------------------------------
+# 0. 저장 위치 및 설정
+# -----------------------------------------------------------------
+# partitions/
+#   _manifest.json                         데이터 버전 + 현재 세대 폴더 + 파티션 목록 (region, country, 경로)
+#   gen-<uuid>/                            쓰기 1회분 (세대). 매니페스트가 가리키는 세대만 읽음
+#     region=Europe/country=UK/
+#       contracts.parquet                  해당 국가 KOL 행
+#       activities.parquet                 해당 국가 KOL 의 활동 행
+#       _summary.json                      KPI 계산용 요약 (행을 읽지 않고 전체 KPI 계산)
+
+PARTITION_DIR = "partitions"
+MANIFEST_FILE = "_manifest.json"
+SUMMARY_FILE = "_summary.json"
+GENERATION_PREFIX = "gen-"
+UNKNOWN_REGION = "기타"
+
+# 💡 세션은 같은 프로세스의 스레드이므로, 파티션 쓰기는 모듈 lock 으로 한 번에 하나씩
+_write_lock = threading.Lock()
+
+# -----------------------------------------------------------------
+# 1. 국가 -> 지역 매핑
+# -----------------------------------------------------------------
+
+def region_map_from_tracking_chart(path):
+    """
+    'KOL Activities Tracking Chart' 시트에서 Country 열 왼쪽의 지역(Europe, APAC, MEA ...) 열을 읽어
+    {국가: 지역} 매핑을 만듭니다. 지역은 묶음의 첫 행에만 적혀 있으므로 아래로 채워 넣습니다.
+    """
+    try:
+        raw = pd.read_csv(path, header=None, dtype=str, encoding='utf-8-sig')
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        return {}
+
+    header_hits = raw.eq('Country')
+    if not header_hits.to_numpy().any():
+        return {}
+    header_row = header_hits.any(axis=1).idxmax()
+    country_col = header_hits.loc[header_row].idxmax()
+    if country_col == 0:
+        return {}
+
+    body = raw.loc[header_row + 1:, [country_col - 1, country_col]].dropna(how='all')
+    body.columns = ['Region', 'Country']
+    body['Region'] = body['Region'].ffill()
+    body = body.dropna(subset=['Country'])
+    return dict(zip(body['Country'].str.strip(), body['Region'].fillna(UNKNOWN_REGION).str.strip()))
+
+def _partition_keys(master_df, activities_df, region_map):
+    """master_df / activities_df 각 행의 (Region, Country) 를 구합니다. 활동은 Kol_ID 로 KOL 의 국가를 따라갑니다."""
+    countries = master_df['Country'].fillna(UNKNOWN_REGION).astype(str).str.strip() if 'Country' in master_df.columns \
+        else pd.Series(UNKNOWN_REGION, index=master_df.index)
+    if 'Region' in master_df.columns:
+        regions = master_df['Region'].fillna(countries.map(region_map)).fillna(UNKNOWN_REGION)
+    else:
+        regions = countries.map(region_map).fillna(UNKNOWN_REGION)
+    master_keys = pd.DataFrame({'Region': regions.astype(str).str.strip().to_numpy(), 'Country': countries.to_numpy()}, index=master_df.index)
+
+    kol_keys = master_keys.assign(Kol_ID=master_df['Kol_ID'].to_numpy()).drop_duplicates('Kol_ID').set_index('Kol_ID')
+    activity_keys = kol_keys.reindex(activities_df['Kol_ID'].to_numpy()).fillna(UNKNOWN_REGION)
+    activity_keys.index = activities_df.index
+    return master_keys, activity_keys
+
+def _safe_name(value):
+    return str(value).replace('/', '_').replace('\\', '_')
+
+# -----------------------------------------------------------------
+# 2. 파티션 쓰기 (데이터 버전별 1회)
+# -----------------------------------------------------------------
+
+def summarize_partition(master_df, activities_df):
+    """파티션 하나의 KPI 요약. 합계 형태로 저장해 여러 파티션을 더해도 전체 KPI 가 정확히 나오도록 합니다."""
+    return {
+        'kol_count': int(len(master_df)),
+        'total_budget': float(master_df['Budget (USD)'].sum()),
+        'total_spent': float(master_df['Spent (USD)'].sum()),
+        'completion_rate_sum': float(completion_rate(master_df['Kol_ID'], activities_df['Kol_ID'], done_flags(activities_df['Status'])).sum()),
+        'activity_total': int(len(activities_df)),
+        'activity_done': int((activities_df['Status'] == 'Done').sum()),
+        'status_counts': {str(k): int(v) for k, v in activities_df['Status'].value_counts().items()},
+    }
+
+def write_partitions(master_df, activities_df, data_version, region_map, root=PARTITION_DIR):
+    """
+    데이터를 region=/country= 폴더로 나눠 저장하고 매니페스트를 반환합니다.
+    새 세대 폴더에 모두 쓴 뒤 매니페스트 파일만 원자적으로 교체하므로, 쓰는 중에도 다른 세션은 이전 세대를 그대로 읽습니다.
+    lock 을 기다리는 동안 다른 세션이 같은 데이터 버전을 이미 썼으면 다시 쓰지 않습니다.
+    """
+    with _write_lock:
+        previous = read_manifest(root)
+        if previous is not None and previous['data_version'] == data_version:
+            return previous
+        manifest = _write_generation(master_df, activities_df, data_version, region_map, root)
+        _remove_old_generations(root, keep={manifest['generation'], (previous or {}).get('generation')})
+    return manifest
+
+def _write_generation(master_df, activities_df, data_version, region_map, root):
+    master_keys, activity_keys = _partition_keys(master_df, activities_df, region_map)
+    generation = f"{GENERATION_PREFIX}{uuid.uuid4().hex}"
+    gen_root = os.path.join(root, generation)
+    os.makedirs(gen_root)
+
+    # 💡 master 에 없는 Kol_ID 의 활동도 '기타' 파티션으로 보존
+    master_groups = dict(list(master_df.groupby([master_keys['Region'], master_keys['Country']])))
+    activity_groups = dict(list(activities_df.groupby([activity_keys['Region'], activity_keys['Country']])))
+
+    partitions = []
+    for region, country in sorted(set(master_groups) | set(activity_groups)):
+        master_part = master_groups.get((region, country), master_df.iloc[:0])
+        activities_part = activity_groups.get((region, country), activities_df.iloc[:0])
+        rel_path = os.path.join(f"region={_safe_name(region)}", f"country={_safe_name(country)}")
+        part_dir = os.path.join(gen_root, rel_path)
+        os.makedirs(part_dir)
+        master_part.to_parquet(os.path.join(part_dir, "contracts.parquet"), index=False)
+        activities_part.to_parquet(os.path.join(part_dir, "activities.parquet"), index=False)
+
+        summary = summarize_partition(master_part, activities_part)
+        with open(os.path.join(part_dir, SUMMARY_FILE), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False)
+        partitions.append({'region': region, 'country': country, 'path': rel_path})
+
+    # 💡 지역을 찾지 못한 국가 (화면에서 매핑 설정 안내용)
+    unmapped = master_keys.loc[master_keys['Region'] == UNKNOWN_REGION, 'Country']
+    manifest = {
+        'data_version': data_version,
+        'generation': generation,
+        'partitions': partitions,
+        'unmapped_countries': sorted(set(unmapped) - {UNKNOWN_REGION}),
+    }
+    # 💡 매니페스트를 임시 파일에 쓴 뒤 교체 -> 읽는 쪽은 항상 완성된 세대 하나만 봄
+    tmp_path = os.path.join(root, f"{MANIFEST_FILE}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(root, MANIFEST_FILE))
+    return manifest
+
+def _remove_old_generations(root, keep):
+    """현재/직전 세대만 남기고 지웁니다. (직전 세대는 교체 직전에 매니페스트를 읽은 세션이 아직 읽고 있을 수 있음)"""
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if name in keep or not os.path.isdir(path):
+            continue
+        shutil.rmtree(path, ignore_errors=True)  # 이전 세대 + 예전 형식(region=... 바로 아래)의 폴더
+
+# -----------------------------------------------------------------
+# 3. 파티션 읽기 (가지치기) / 요약 합산
+# -----------------------------------------------------------------
+
+def read_manifest(root=PARTITION_DIR):
+    path = os.path.join(root, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def _partition_dir(manifest, partition, root):
+    return os.path.join(root, manifest.get('generation', ''), partition['path'])
+
+def manifest_regions(manifest):
+    return sorted({p['region'] for p in manifest['partitions']})
+
+def region_mapping_missing(manifest):
+    """KOL 이 있는데 모두 '기타' 지역으로 분류됐으면 True (국가 -> 지역 매핑이 비어 있음)"""
+    return bool(manifest['partitions']) and manifest_regions(manifest) == [UNKNOWN_REGION]
+
+def read_partitions(manifest, regions=None, countries=None, root=PARTITION_DIR):
+    """선택한 지역/국가의 파티션 파일만 읽어 (master_df, activities_df) 를 반환합니다."""
+    selected = [
+        p for p in manifest['partitions']
+        if (not regions or p['region'] in regions) and (not countries or p['country'] in countries)
+    ]
+    if not selected:
+        return None, None
+    master_df = pd.concat([pd.read_parquet(os.path.join(_partition_dir(manifest, p, root), "contracts.parquet")) for p in selected], ignore_index=True)
+    activities_df = pd.concat([pd.read_parquet(os.path.join(_partition_dir(manifest, p, root), "activities.parquet")) for p in selected], ignore_index=True)
+    return master_df, activities_df
+
+def summarize_partitions(manifest, regions=None, root=PARTITION_DIR):
+    """파티션별 요약 파일만 더해서 KPI 를 계산합니다. (행 데이터는 읽지 않음)"""
+    totals = {'kol_count': 0, 'total_budget': 0.0, 'total_spent': 0.0, 'completion_rate_sum': 0.0, 'activity_total': 0, 'activity_done': 0}
+    status_counts = {}
+    for p in manifest['partitions']:
+        if regions and p['region'] not in regions:
+            continue
+        with open(os.path.join(_partition_dir(manifest, p, root), SUMMARY_FILE), encoding='utf-8') as f:
+            summary = json.load(f)
+        for key in totals:
+            totals[key] += summary[key]
+        for status, count in summary['status_counts'].items():
+            status_counts[status] = status_counts.get(status, 0) + count
+
+    return {
+        'total_kols': totals['kol_count'],
+        'total_budget': totals['total_budget'],
+        'total_spent': totals['total_spent'],
+        'avg_completion': totals['completion_rate_sum'] / totals['kol_count'] if totals['kol_count'] else 0.0,
+        'avg_utilization': (totals['total_spent'] / totals['total_budget']) * 100 if totals['total_budget'] > 0 else 0,
+        'activity_total': totals['activity_total'],
+        'activity_done': totals['activity_done'],
+        'status_counts': status_counts,
+    }
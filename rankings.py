@@ -0,0 +1,98 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import heapq
+from itertools import islice
+
+# -----------------------------------------------------------------
+# 1. 순위 지표 정의
+# -----------------------------------------------------------------
+
+# 표시 이름 -> (값 컬럼, 축 제목, 숫자 형식, 백분율 여부)
+RANKING_METRICS = {
+    "완료율": ('Completion_Rate', '활동 완료율 (%)', '.1f', True),
+    "예산 활용률": ('Utilization_Rate', '예산 활용률 (%)', '.1f', True),
+    "활동 건수": ('Activity_Count', '활동 건수 (건)', 'd', False),
+    "예산": ('Budget (USD)', '예산 (USD)', '$,.0f', False),
+}
+
+UNKNOWN_GROUP = "미지정"
+
+def _group_column(master_df, column):
+    """필터용 컬럼(Country, KOL_Type)이 없거나 비어 있으면 '미지정'으로 채웁니다."""
+    if column not in master_df.columns:
+        return np.full(len(master_df), UNKNOWN_GROUP, dtype=object)
+    return master_df[column].fillna(UNKNOWN_GROUP).astype(str).to_numpy()
+
+# -----------------------------------------------------------------
+# 2. 순위 인덱스 (데이터 버전별 사전 정렬 + 힙 병합)
+# -----------------------------------------------------------------
+
+class KolRanking:
+    """
+    지표별로 (국가, KOL 등급) 그룹마다 내림차순 정렬된 행 위치를 미리 저장합니다.
+    리더보드는 선택된 그룹들의 앞부분만 힙으로 병합해 N 개를 꺼내므로 O(N log g) 입니다. (g = 그룹 수)
+    """
+
+    def __init__(self, master_df, engine, derived):
+        self.countries = _group_column(master_df, 'Country')
+        self.kol_types = _group_column(master_df, 'KOL_Type')
+        self.country_options = sorted(set(self.countries))
+        self.type_options = sorted(set(self.kol_types))
+
+        self.values = {
+            'Completion_Rate': engine.completion_rates(),
+            'Utilization_Rate': derived.column('master', 'Utilization_Rate').to_numpy(dtype=float),
+            'Activity_Count': engine.kol_counts()[0].astype(float),
+            'Budget (USD)': master_df['Budget (USD)'].to_numpy(dtype=float),
+        }
+
+        group_codes, self.groups = pd.factorize(pd.Series(list(zip(self.countries, self.kol_types))))
+        self.orders = {}
+        for column, values in self.values.items():
+            # 값 내림차순 -> 그룹 코드로 안정 정렬: 그룹 안에서는 값 내림차순이 유지됨
+            order = np.argsort(-np.nan_to_num(values, nan=-np.inf), kind='stable')
+            order = order[np.argsort(group_codes[order], kind='stable')]
+            bounds = np.searchsorted(group_codes[order], np.arange(len(self.groups) + 1))
+            self.orders[column] = {
+                group: order[bounds[i]:bounds[i + 1]] for i, group in enumerate(self.groups)
+            }
+
+    def _selected_groups(self, countries, kol_types):
+        return [
+            g for g in self.groups
+            if (not countries or g[0] in countries) and (not kol_types or g[1] in kol_types)
+        ]
+
+    def top(self, column, n, countries=None, kol_types=None, values=None):
+        """
+        조건에 맞는 상위 n 개 KOL 의 master_df 행 위치를 반환합니다.
+        values 를 넘기면(예: 기간 필터가 적용된 완료율) 사전 정렬 대신 부분 선택(argpartition)으로 O(n) 에 계산합니다.
+        """
+        if values is not None:
+            mask = np.ones(len(values), dtype=bool)
+            if countries:
+                mask &= np.isin(self.countries, list(countries))
+            if kol_types:
+                mask &= np.isin(self.kol_types, list(kol_types))
+            candidates = np.flatnonzero(mask)
+            scores = np.nan_to_num(values[candidates], nan=-np.inf)
+            if len(candidates) > n:
+                # n 번째 큰 값을 기준으로 자르고, 동점은 기존 순서(행 위치)가 앞선 것부터 채움
+                threshold = np.partition(scores, len(scores) - n)[len(scores) - n]
+                above = np.flatnonzero(scores > threshold)
+                ties = np.flatnonzero(scores == threshold)[:n - len(above)]
+                keep = np.concatenate([above, ties])
+                candidates, scores = candidates[keep], scores[keep]
+            return candidates[np.lexsort((candidates, -scores))]
+
+        values = np.nan_to_num(self.values[column], nan=-np.inf)
+        heads = [self.orders[column][g][:n] for g in self._selected_groups(countries, kol_types)]
+        merged = heapq.merge(*heads, key=lambda pos: (-values[pos], pos))
+        return np.fromiter(islice(merged, n), dtype=np.int64)
+
+
+@st.cache_resource(max_entries=4)
+def get_kol_ranking(data_version, _master_df, _engine, _derived):
+    """데이터 버전별로 순위 인덱스를 한 번만 만들고 모든 세션에서 공유합니다."""
+    return KolRanking(_master_df, _engine, _derived)
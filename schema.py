@@ -0,0 +1,197 @@
+import pandas as pd
+import csv
+import io
+import os
+from typing import NamedTuple
+
+# -----------------------------------------------------------------
+# 0. 스키마 정의
+# -----------------------------------------------------------------
+
+class Field(NamedTuple):
+    target: str             # 앱 내부 열 이름
+    sources: tuple          # 원본 파일의 열 이름 후보 (앞쪽 우선)
+    type: str = "str"       # str / float / date
+    required: bool = False  # 원본에 없으면 로드 실패
+    default: object = None  # 선택 열이 없거나 값이 비었을 때 채울 값
+    format: str = "ISO8601" # date 타입의 날짜 형식
+
+FIELD_TYPES = {"str", "float", "date"}
+_EMPTY_DTYPES = {"str": object, "float": float, "date": "datetime64[ns]"}  # 원본에 없는 선택 열의 타입
+HEADER_SCAN_ROWS = 30  # 제목(배너) 행을 건너뛰며 헤더 행을 찾을 최대 행 수
+REPORT_MAX_COLUMNS = 20  # 불일치 내역에 보여 줄 파일 열 이름 수
+
+# 💡 원본 열 이름은 현재 CSV 내보내기 이름을 먼저, 예전 Google Sheets 이름을 뒤에 둡니다.
+SOURCE_SCHEMAS = {
+    "master": [
+        Field("Kol_ID", ("KOL", "Contract"), required=True),
+        Field("Name", ("KOL", "KOL Name"), required=True),
+        Field("KOL_Type", ("KOL Type",)),
+        Field("Country", ("Country",)),
+        Field("Region", ("Region",)),  # 있으면 지역 파티션에서 국가 -> 지역 매핑보다 우선
+        Field("Contract_Start", ("Contract Start", "Contract Start Date"), "date"),
+        Field("Contract_End", ("Contract End", "Contract End Date"), "date", required=True),
+        Field("Budget (USD)", ("Contract Value (USD)", "Budget (USD)"), "float", default=0.0),
+        Field("Spent (USD)", ("Spent (USD)",), "float", default=0.0),
+    ],
+    "activities": [
+        Field("Activity_ID", ("Activity ID",), required=True),
+        Field("Kol_ID", ("KOL", "Contract"), required=True),
+        Field("Activity_Type", ("Activity Type",)),
+        Field("Due_Date", ("Planned Date", "Due Date"), "date", required=True),
+        Field("Status", ("Status",), required=True),
+        Field("File_Link", ("File Link",)),
+    ],
+}
+
+class SchemaMismatchError(ValueError):
+    """원본 파일의 열 구성이 스키마와 맞지 않을 때 발생합니다. 메시지에 불일치 내역이 들어 있습니다."""
+
+# -----------------------------------------------------------------
+# 1. 스키마 컴파일 (모듈 로드 시 1회 검증)
+# -----------------------------------------------------------------
+
+class CompiledSchema:
+    """Field 목록을 검증하고, 헤더 매칭 / CSV 읽기 / 타입 변환을 한 곳에서 처리합니다."""
+
+    def __init__(self, name, fields):
+        targets = [f.target for f in fields]
+        duplicated = sorted({t for t in targets if targets.count(t) > 1})
+        if duplicated:
+            raise ValueError(f"[{name}] 내부 열 이름 중복: {duplicated}")
+        for f in fields:
+            if f.type not in FIELD_TYPES:
+                raise ValueError(f"[{name}] {f.target}: 알 수 없는 타입 '{f.type}' (사용 가능: {sorted(FIELD_TYPES)})")
+            if not f.sources:
+                raise ValueError(f"[{name}] {f.target}: 원본 열 이름 후보가 없습니다.")
+            if f.required and f.default is not None:
+                raise ValueError(f"[{name}] {f.target}: 필수 열에는 기본값을 둘 수 없습니다.")
+
+        self.name = name
+        self.fields = list(fields)
+        self.source_columns = list(dict.fromkeys(s for f in fields for s in f.sources))
+
+    def resolve(self, header, path=""):
+        """헤더에서 필드별 원본 열을 찾습니다. 필수 열이 없으면 불일치 내역과 함께 SchemaMismatchError."""
+        present = {str(c).strip(): c for c in header if pd.notnull(c)}
+        mapping, missing = {}, []
+        for f in self.fields:
+            source = next((present[s] for s in f.sources if s in present), None)
+            if source is not None:
+                mapping[f.target] = source
+            elif f.required:
+                missing.append(f)
+
+        if missing:
+            lines = [f"'{self.name}' 원본({path or '메모리'})의 열이 스키마와 맞지 않습니다."]
+            lines += [f"  - 필수 열 '{f.target}' 없음 (찾은 이름 후보: {', '.join(f.sources)})" for f in missing]
+            named = [c for c in present if not c.startswith('Unnamed:')]  # 이름 없는 열(pandas 자동 이름)은 제외
+            shown = ', '.join(named[:REPORT_MAX_COLUMNS]) + (f" 외 {len(named) - REPORT_MAX_COLUMNS}개" if len(named) > REPORT_MAX_COLUMNS else '')
+            lines.append(f"  - 파일에 있는 열: {shown or '(없음)'}")
+            raise SchemaMismatchError("\n".join(lines))
+        return mapping
+
+    def convert(self, raw, mapping):
+        """원본 열(raw)을 내부 열 이름/타입으로 바꾸고, 선택 열은 기본값으로 채웁니다."""
+        df = pd.DataFrame(index=raw.index)
+        for f in self.fields:
+            if f.target not in mapping:
+                df[f.target] = pd.Series(f.default, index=raw.index, dtype=_EMPTY_DTYPES[f.type])
+                continue
+            values = raw[mapping[f.target]]
+            if f.type == "date":
+                values = pd.to_datetime(values, format=f.format, errors='coerce')
+            elif f.type == "float":
+                values = pd.to_numeric(values.str.replace(',', '', regex=False), errors='coerce').astype(float)
+            if f.default is not None:
+                values = values.fillna(f.default)
+            df[f.target] = values
+        return df
+
+    def apply(self, raw):
+        """이미 읽은 원본 DataFrame(예: 엑셀 시트)에 스키마를 적용합니다."""
+        mapping = self.resolve(raw.columns)
+        raw = raw.dropna(how='all', subset=list(dict.fromkeys(mapping.values())))
+        return self.convert(raw.reset_index(drop=True), mapping)
+
+    def read_csv(self, path):
+        """
+        CSV 를 스키마대로 읽습니다.
+        - 앞쪽 배너 행을 건너뛰고 헤더 행을 찾음
+        - 끝부분의 빈 행 묶음(,,,,,)은 읽기 전에 잘라냄
+        - 사용하는 열만(usecols) 문자열로 읽은 뒤 선언된 타입으로 변환
+        """
+        header_row = self._find_header_row(path)
+        header = pd.read_csv(path, skiprows=header_row, nrows=0, encoding='utf-8-sig').columns
+        mapping = self.resolve(header, path)
+        usecols = list(dict.fromkeys(mapping.values()))
+
+        with open(path, 'rb') as f:
+            data_end = _data_end_offset(f)
+            f.seek(0)
+            raw = pd.read_csv(
+                io.BufferedReader(_BoundedReader(f, data_end)),
+                skiprows=header_row,
+                usecols=usecols,
+                dtype={c: str for c in usecols},
+                encoding='utf-8-sig',
+            )
+        raw = raw.dropna(how='all')  # 중간에 끼어 있는 빈 행 (사용 열 기준)
+        return self.convert(raw.reset_index(drop=True), mapping)
+
+    def _find_header_row(self, path):
+        """
+        앞쪽 HEADER_SCAN_ROWS 행 중 스키마 열 이름이 가장 많이 들어 있는 행 번호 (없으면 0)
+        행마다 필드 수가 달라도 (쉼표 없는 제목 행 등) 건너뛰지 않도록 csv.reader 로 한 행씩 읽습니다.
+        """
+        wanted = set(self.source_columns)
+        best_row, best_hits = 0, 0
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            for row_idx, row in enumerate(csv.reader(f)):
+                if row_idx >= HEADER_SCAN_ROWS:
+                    break
+                hits = len(wanted & {value.strip() for value in row})
+                if hits > best_hits:
+                    best_row, best_hits = row_idx, hits
+        return best_row
+
+# -----------------------------------------------------------------
+# 2. 끝부분 빈 행 묶음 잘라내기
+# -----------------------------------------------------------------
+
+_BLANK_BYTES = b", \t\r\n"
+
+def _data_end_offset(f, chunk_size=1 << 16):
+    """파일 끝에서부터 거꾸로 읽어, 구분자/공백만 있는 마지막 묶음이 시작되는 바이트 위치를 찾습니다."""
+    f.seek(0, os.SEEK_END)
+    end = f.tell()
+    while end > 0:
+        start = max(end - chunk_size, 0)
+        f.seek(start)
+        chunk = f.read(end - start)
+        stripped = chunk.rstrip(_BLANK_BYTES)
+        if stripped:
+            return start + len(stripped)
+        end = start
+    return 0
+
+class _BoundedReader(io.RawIOBase):
+    """파일을 limit 바이트까지만 읽게 하는 래퍼 (끝부분 빈 행은 파서에 넘기지 않음)"""
+
+    def __init__(self, f, limit):
+        self.f, self.remaining = f, limit
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.remaining)
+        if size <= 0:
+            return 0
+        data = self.f.read(size)
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+# 💡 모듈 로드 시 한 번만 컴파일/검증
+SCHEMAS = {name: CompiledSchema(name, fields) for name, fields in SOURCE_SCHEMAS.items()}
@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from alerts import AlertTracker, run_once
+from history import record_snapshot
+
+# -----------------------------------------------------------------
+# 전송 실패 후 재시도 시 알림이 사라지지 않는지 확인
+# -----------------------------------------------------------------
+
+MASTER = pd.DataFrame({
+    "Kol_ID": ["K1", "K2"], "Name": ["Alice", "Bob"], "KOL_Type": ["A", "B"], "Country": ["KR", "JP"],
+    "Contract_Start": pd.to_datetime(["2026-01-01", "2026-01-01"]),
+    "Contract_End": pd.to_datetime(["2026-10-25", "2027-06-01"]),
+    "Budget (USD)": [100.0, 100.0], "Spent (USD)": [0.0, 0.0],
+})
+ACTIVITIES = pd.DataFrame({
+    "Activity_ID": ["A1", "A2"], "Kol_ID": ["K1", "K2"], "Activity_Type": ["Post", "Video"],
+    "Due_Date": pd.to_datetime(["2026-10-10", "2026-10-21"]), "Status": ["Planned", "Planned"], "File_Link": ["", ""],
+})
+
+class FlakySink:
+    """처음 fails 번은 전송에 실패하는 sink"""
+
+    def __init__(self, fails=0):
+        self.fails, self.sent = fails, []
+
+    def send(self, subject, body, alerts):
+        if self.fails:
+            self.fails -= 1
+            raise ConnectionError("sink down")
+        self.sent += alerts
+
+@pytest.mark.parametrize("restart", [False, True])
+def test_failed_send_is_retried(tmp_path, restart):
+    history_root, state_path = str(tmp_path / "history"), str(tmp_path / "alerts" / "state.json")
+
+    def make_tracker():
+        tracker = AlertTracker(history_root=history_root, state_path=state_path)
+        tracker.refresh_source = lambda: None  # 원본 파일 대신 테스트 데이터로 기록
+        return tracker
+
+    record_snapshot(MASTER, ACTIVITIES, root=history_root)
+    tracker = make_tracker()
+    assert run_once(tracker, FlakySink(), "2026-10-19") == 2  # K1 만료 임박, A1 지연
+
+    # 새 버전(K2 만료일 변경) + 날짜 경과(A2 지연) 알림을 보내다 실패
+    changed = MASTER.assign(Contract_End=pd.to_datetime(["2026-10-25", "2026-11-01"]))
+    record_snapshot(changed, ACTIVITIES, root=history_root)
+    sink = FlakySink(fails=1)
+    with pytest.raises(ConnectionError):
+        run_once(tracker, sink, "2026-10-22")
+
+    if restart:
+        tracker = make_tracker()
+    assert run_once(tracker, sink, "2026-10-22") == 2
+    assert sorted(a["key"] for a in sink.sent) == ["A2#0", "K2#0"]
+
+    # 보낸 뒤에는 같은 알림을 다시 보내지 않음
+    assert run_once(tracker, FlakySink(), "2026-10-22") == 0
+    assert run_once(make_tracker(), FlakySink(), "2026-10-23") == 0
@@ -0,0 +1,99 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from link_health import (
+    LinkHealthChecker, STATUS_INVALID, STATUS_MOVED, STATUS_NOT_FOUND, STATUS_OK, STATUS_PENDING,
+)
+
+# -----------------------------------------------------------------
+# 로컬 HTTP 대역 서버 (127.0.0.1)
+# -----------------------------------------------------------------
+
+class _Handler(BaseHTTPRequestHandler):
+    def _reply(self, method):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+        try:
+            if self.path.startswith("/slow"):
+                time.sleep(0.1)
+            if self.path == "/missing":
+                self.send_response(404)
+            elif self.path == "/no-head" and method == "HEAD":
+                self.send_response(405)
+            elif self.path == "/redirect":
+                self.send_response(302)
+                self.send_header("Location", "/ok")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def do_HEAD(self):
+        self._reply("HEAD")
+
+    def do_GET(self):
+        self._reply("GET")
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.lock, httpd.in_flight, httpd.peak = threading.Lock(), 0, 0
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+def _url(server, path):
+    return f"http://127.0.0.1:{server.server_port}{path}"
+
+# -----------------------------------------------------------------
+# 상태 판정 / 호스트별 동시 요청 제한
+# -----------------------------------------------------------------
+
+def test_check_statuses(server):
+    checker = LinkHealthChecker(per_host_interval=0, timeout=2)
+    results = checker.check([_url(server, p) for p in ("/ok", "/missing", "/no-head", "/redirect")])
+
+    assert results[_url(server, "/ok")] == (STATUS_OK, 200)
+    assert results[_url(server, "/missing")] == (STATUS_NOT_FOUND, 404)
+    assert results[_url(server, "/no-head")] == (STATUS_OK, 200)  # HEAD 405 -> GET 으로 재확인
+    assert results[_url(server, "/redirect")] == (STATUS_MOVED, 200)
+
+def test_lookup_marks_invalid_links_without_request(server):
+    checker = LinkHealthChecker(per_host_interval=0, timeout=2)
+    links = pd.Series(["ftp://example.com/a.pdf", "not a link", None, _url(server, "/ok")])
+
+    statuses = checker.lookup(links)
+
+    assert statuses.tolist()[:3] == [STATUS_INVALID, STATUS_INVALID, ""]
+    assert statuses.iloc[3] == STATUS_PENDING
+    deadline = time.monotonic() + 5
+    while checker.pending_count() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert checker.lookup(links).iloc[3] == STATUS_OK
+
+def test_per_host_limit_is_shared_across_batches(server):
+    checker = LinkHealthChecker(max_concurrency=16, per_host_concurrency=2, per_host_interval=0.01, timeout=2)
+    batches = [[_url(server, f"/slow/{b}-{i}") for i in range(6)] for b in range(3)]
+
+    results = {}
+    threads = [threading.Thread(target=lambda batch=batch: results.update(checker.check(batch))) for batch in batches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert 1 <= server.peak <= 2
+    assert [status for status, _ in results.values()] == [STATUS_OK] * 18
@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+from schema import SCHEMAS, SchemaMismatchError
+
+# -----------------------------------------------------------------
+# 제목(배너) 행 / 끝부분 빈 행 묶음이 있는 CSV 읽기
+# -----------------------------------------------------------------
+
+HEADER = "KOL,KOL Type,Country,Contract Start,Contract End,Contract Value (USD),Spent (USD)"
+ROWS = [
+    "Dr.A,A,UK,2026-01-01,2026-12-31,\"1,000\",250",
+    "Dr.B,B,Japan,2026-02-01,2027-01-31,500,",
+]
+
+def _write(tmp_path, lines):
+    path = tmp_path / "contracts.csv"
+    path.write_text("\ufeff" + "\r\n".join(lines) + "\r\n", encoding="utf-8")
+    return str(path)
+
+@pytest.mark.parametrize("banner", [
+    [],
+    ["Contract list exported 2026", "Sales team"],    # 쉼표 없는 한 칸짜리 제목 행
+    ["Contract list exported 2026", "", ",,,,,,"],    # 빈 행 / 쉼표만 있는 행
+])
+def test_read_csv_skips_banner_and_trailing_blank_rows(tmp_path, banner):
+    path = _write(tmp_path, banner + [HEADER] + ROWS + [",,,,,,"] * 5)
+
+    df = SCHEMAS["master"].read_csv(path)
+
+    assert df["Kol_ID"].tolist() == ["Dr.A", "Dr.B"]
+    assert df["Country"].tolist() == ["UK", "Japan"]
+    assert df["Contract_End"].tolist() == [pd.Timestamp("2026-12-31"), pd.Timestamp("2027-01-31")]
+    assert df["Budget (USD)"].tolist() == [1000.0, 500.0]
+    assert df["Spent (USD)"].tolist() == [250.0, 0.0]  # 빈 값은 기본값
+
+def test_read_csv_reports_missing_required_columns(tmp_path):
+    path = _write(tmp_path, ["Contract list exported 2026", "KOL,Country", "Dr.A,UK"])
+
+    with pytest.raises(SchemaMismatchError, match="Contract_End"):
+        SCHEMAS["master"].read_csv(path)
@@ -1,6 +1,32 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import os
+import threading
 from datetime import datetime, timedelta 
+from history import record_snapshot
+from partitions import read_manifest, write_partitions, read_partitions, region_map_from_tracking_chart
+from xlsx_source import read_workbook_tables
+from schema import SCHEMAS, SchemaMismatchError
+from derived import done_flags
+
+MASTER_FILE = "contracts.csv"
+ACTIVITIES_FILE = "activities.csv"
+
+# 💡 원본 엑셀 통합 문서 (있으면 CSV 대신 직접 읽음): 파일 -> {테이블: 시트 이름 (None 이면 첫 번째 시트)}
+# 두 테이블이 한 파일의 서로 다른 시트에 있으면 한 항목에 같이 적으면 한 번에 읽습니다.
+#   예) {"kol_tracking.xlsx": {"master": "KOL_Master", "activities": "Activities"}}
+SOURCE_WORKBOOKS = {
+    "contracts.xlsx": {"master": None},
+    "activities.xlsx": {"activities": None},
+}
+
+# 💡 원본 열 이름 -> 내부 열 이름 / 타입 / 필수 여부는 schema.py 의 SOURCE_SCHEMAS 에서 관리합니다.
+
+# 💡 지역 파티션의 국가 -> 지역 매핑 (앞쪽 우선): master 의 Region 열 > REGION_MAP > REGION_TRACKING_CHART
+# REGION_TRACKING_CHART 는 'KOL Activities Tracking Chart' 시트(간트 차트)를 CSV 로 내보낸 파일로, 활동 원본(ACTIVITIES_FILE)과는 별개입니다.
+REGION_TRACKING_CHART = "tracking_chart.csv"
+REGION_MAP = {}  # 예) {"UK": "Europe", "Japan": "APAC"}
 
 # -----------------------------------------------------------------
 # 0. 유틸리티 함수 (차트 축 계산)
@@ -19,87 +45,155 @@ def get_max_value(df, column, is_percentage=False):
         # 건수/금액은 최대값보다 10% 크게 설정
         return max_val * 1.1 if max_val > 0 else 10
 
+def get_data_version():
+    """원본 파일의 수정 시각/크기로 데이터 버전 문자열을 만듭니다. (캐시 키로 사용)"""
+    parts = []
+    for path in (MASTER_FILE, ACTIVITIES_FILE, *SOURCE_WORKBOOKS, REGION_TRACKING_CHART):
+        try:
+            stat = os.stat(path)
+            parts.append(f"{path}:{stat.st_mtime_ns}:{stat.st_size}")
+        except FileNotFoundError:
+            parts.append(f"{path}:missing")
+    return "|".join(parts)
+
 # -----------------------------------------------------------------
-# 1. 💡 CSV 파일에서 데이터 로드 (gspread 제거됨)
+# 1. 💡 엑셀 / CSV 파일에서 데이터 로드 (gspread 제거됨)
 # -----------------------------------------------------------------
 
+@st.cache_data(max_entries=8)
+def read_workbook_cached(path, file_version, tables):
+    """통합 문서 읽기 결과를 파일 버전(수정 시각/크기)별로 캐시합니다."""
+    return read_workbook_tables(path, tables)
+
+def read_source_tables():
+    """원본 엑셀이 있으면 엑셀에서, 없으면 CSV 에서 (master, activities) 를 스키마대로 읽습니다. (내부 열 이름/타입 적용 완료)"""
+    tables = {}
+    for path, sheets in SOURCE_WORKBOOKS.items():
+        if os.path.exists(path):
+            stat = os.stat(path)
+            spec = {table: (sheet, SCHEMAS[table].source_columns) for table, sheet in sheets.items()}
+            tables.update(read_workbook_cached(path, f"{stat.st_mtime_ns}:{stat.st_size}", spec))
+
+    # 💡 엑셀이 없으면 파일 이름은 우리가 1단계에서 바꾼 CSV (모듈 상단의 MASTER_FILE / ACTIVITIES_FILE)
+    master_df = SCHEMAS['master'].apply(tables['master']) if 'master' in tables else SCHEMAS['master'].read_csv(MASTER_FILE)
+    activities_df = SCHEMAS['activities'].apply(tables['activities']) if 'activities' in tables else SCHEMAS['activities'].read_csv(ACTIVITIES_FILE)
+    return master_df, activities_df
+
+def read_source_frames():
+    """
+    원본 파일을 읽어 (master_df, activities_df) 를 만듭니다.
+    Streamlit 화면 없이도 동작하므로 알림 스케줄러 같은 백그라운드 작업에서도 사용합니다. (에러는 그대로 발생)
+    """
+    # --- 데이터 로드 (💡 열 이름 매핑 / 타입 변환 / 빈 행 제거는 schema.py 에서 읽는 시점에 처리) ---
+    # 💡 Done / Completion_Rate 같은 파생 열은 여기서 만들지 않고, 페이지가 요청할 때 derived.py 에서 계산
+    master_df, activities_df = read_source_tables()
+    return master_df, activities_df
+
 @st.cache_data(ttl=60) 
 def load_data_from_csv():
     """모든 페이지에서 공유할 데이터 로드 함수"""
     
-    # 💡 파일 이름은 우리가 1단계에서 바꾼 이름
-    MASTER_FILE = "contracts.csv"
-    ACTIVITIES_FILE = "activities.csv"
-    
     try:
-        # --- 데이터 로드 ---
-        master_df = pd.read_csv(MASTER_FILE, dtype=str).dropna(how='all') 
-        activities_df = pd.read_csv(ACTIVITIES_FILE, dtype=str).dropna(how='all')
-        
-        # --- 💡 CSV 컬럼 이름 매핑 (사장님 파일 기준) ---
-        # Google Sheets 열 이름 -> CSV 열 이름
-master_df = master_df.rename(columns={
-        "Contract": "Kol_ID",
-        "KOL Type": "KOL_Type",
-        "KOL Name": "Name",
-        "Country": "Country",
-        "Contract Start Date": "Contract Start",
-        "Contract End Date": "Contract End", # 💡 이 "Contract End Date" 부분이 틀렸습니다!
-        "Contract Value (USD)": "Budget (USD)",
-    })
-        
-        activities_df = activities_df.rename(columns={
-            "Activity ID": "Activity_ID",
-            "Contract": "Kol_ID",
-            "Activity Type": "Activity_Type",
-            "Planned Date": "Due_Date",
-            "Status": "Status",
-            "File Link": "File_Link"
-        })
+        master_df, activities_df = read_source_frames()
+
+        # --- 💡 직전 버전 대비 바뀐 행만 스냅샷 이력에 기록 (KPI 추이 차트 / 알림 스케줄러용) ---
+        try:
+            record_snapshot(master_df, activities_df)
+        except Exception as e:
+            st.warning(f"스냅샷 이력 저장 실패: {e}")
 
-        # --- 데이터 타입 변환 및 계산 ---
-        master_df['Contract_End'] = pd.to_datetime(master_df['Contract_End'], errors='coerce')
-        activities_df['Due_Date'] = pd.to_datetime(activities_df['Due_Date'], errors='coerce')
-        master_df['Budget (USD)'] = pd.to_numeric(master_df['Budget (USD)'], errors='coerce').fillna(0)
-        
-        # 💡 CSV에 'Spent (USD)'가 없으므로 0으로 생성
-        if 'Spent (USD)' not in master_df.columns:
-            master_df['Spent (USD)'] = 0 
-        else:
-            master_df['Spent (USD)'] = pd.to_numeric(master_df['Spent (USD)'], errors='coerce').fillna(0)
-
-        
-        activities_df['Done'] = activities_df['Status'].apply(lambda x: 1 if x == 'Done' else 0)
-        activity_summary = activities_df.groupby('Kol_ID').agg(Total=('Activity_ID', 'count'), Done=('Done', 'sum')).reset_index()
-        activity_summary['Completion_Rate'] = (activity_summary['Done'] / activity_summary['Total']) * 100
-        master_df = pd.merge(master_df, activity_summary[['Kol_ID', 'Completion_Rate']], on='Kol_ID', how='left').fillna({'Completion_Rate': 0})
-        master_df['Utilization_Rate'] = (master_df['Spent (USD)'] / master_df['Budget (USD)']) * 100
-        master_df['Utilization_Rate'] = master_df['Utilization_Rate'].fillna(0).apply(lambda x: min(x, 100))
-        
-        activities_df['YearMonth'] = activities_df['Due_Date'].dt.to_period('M').astype(str)
-
-        st.success("🎉 CSV 데이터 로드 및 초기 계산 완료!")
+        # --- 💡 데이터 버전이 바뀌었으면 지역/국가 파티션도 다시 쓰기 (지역별 로드용) ---
+        try:
+            write_partitions_if_stale(master_df, activities_df, get_data_version())
+        except Exception as e:
+            st.warning(f"지역 파티션 저장 실패: {e}")
+
+        st.success("🎉 데이터 로드 완료!")
         return master_df, activities_df
 
     except FileNotFoundError as e:
         st.error(f"데이터 파일 찾기 실패: {e.filename} 파일이 GitHub 저장소에 없습니다.")
         st.error("1단계에서 파일 이름을 'contracts.csv'와 'activities.csv'로 변경했는지 확인하세요.")
         return None, None
+    except SchemaMismatchError as e:
+        st.error("원본 파일의 열 구성이 앱에서 기대하는 형식과 다릅니다. 아래 내역을 확인하세요.")
+        st.code(str(e), language=None)
+        return None, None
     except Exception as e:
         st.error(f"데이터 로드 중 에러 발생: {e}")
         return None, None
 
+# -----------------------------------------------------------------
+# 1-1. 지역(Region)/국가 파티션 로드
+# -----------------------------------------------------------------
+
+def load_region_map():
+    """설정된 트래킹 차트와 REGION_MAP 으로 {국가: 지역} 매핑을 만듭니다. (REGION_MAP 우선, 둘 다 없으면 빈 매핑)"""
+    return {**region_map_from_tracking_chart(REGION_TRACKING_CHART), **REGION_MAP}
+
+def write_partitions_if_stale(master_df, activities_df, data_version):
+    """파티션 매니페스트의 데이터 버전이 다르면 파티션을 다시 쓰고 매니페스트를 반환합니다."""
+    manifest = read_manifest()
+    if manifest is None or manifest['data_version'] != data_version:
+        manifest = write_partitions(master_df, activities_df, data_version, load_region_map())
+    return manifest
+
+@st.cache_data(ttl=60)
+def get_partition_manifest(data_version):
+    """현재 데이터 버전의 파티션 매니페스트. 파티션이 없거나 오래됐으면 원본을 한 번 읽어 다시 씁니다."""
+    manifest = read_manifest()
+    if manifest is not None and manifest['data_version'] == data_version:
+        return manifest
+    try:
+        return write_partitions_if_stale(*read_source_frames(), data_version)
+    except Exception:
+        return None
+
+@st.cache_data(ttl=60)
+def load_region_data(data_version, region):
+    """선택한 지역의 파티션 파일만 읽습니다. (다른 지역 행은 읽지 않음)"""
+    manifest = get_partition_manifest(data_version)
+    if manifest is None:
+        return None, None
+    return read_partitions(manifest, regions=[region])
+
+def load_dashboard_data():
+    """
+    사이드바에서 선택한 지역(selected_region)에 맞춰 (master_df, activities_df, view_version) 을 반환합니다.
+    view_version 은 데이터 버전 + 지역이며, KPI 엔진/순위/차트 캐시 키로 사용합니다.
+    """
+    data_version = get_data_version()
+    region = st.session_state.get('selected_region', "전체")
+    if region == "전체":
+        master_df, activities_df = load_data_from_csv()
+    else:
+        master_df, activities_df = load_region_data(data_version, region)
+    return master_df, activities_df, f"{data_version}|{region}"
+
 # -----------------------------------------------------------------
 # 2. 조건부 서식 함수 정의 (공용 함수)
 # -----------------------------------------------------------------
 
+def _to_day(value):
+    """날짜(Timestamp 또는 Series)를 자정 기준으로 맞춥니다. (날짜 단위 비교용)"""
+    if isinstance(value, pd.Series):
+        return value.dt.normalize()
+    return pd.Timestamp(value).normalize() if pd.notnull(value) else pd.NaT
+
+def is_contract_imminent(contract_end, today, alert_days=30):
+    """계약 만료일이 오늘부터 alert_days 일 이내인지 판정합니다. (단일 값/Series 모두 지원)"""
+    day = _to_day(contract_end)
+    today = pd.Timestamp(today).normalize()
+    return (day >= today) & (day <= today + timedelta(days=alert_days))
+
+def is_activity_overdue(due_date, status, today):
+    """마감일이 지났는데 완료(Done)되지 않은 활동인지 판정합니다. (단일 값/Series 모두 지원)"""
+    day = _to_day(due_date)
+    return (day < pd.Timestamp(today).normalize()) & (status != 'Done')
+
 def highlight_master_row(row, today, alert_days=30):
     """KOL_Master 테이블에서 계약 만료 임박 행을 강조합니다."""
-    contract_end = row['Contract_End']
-    is_imminent = False
-    if pd.notnull(contract_end):
-        is_imminent = (contract_end.date() >= today.date()) and \
-                      (contract_end.date() <= (today + timedelta(days=alert_days)).date())
+    is_imminent = is_contract_imminent(row['Contract_End'], today, alert_days)
     
     if is_imminent:
         return ['background-color: #ffd70040'] * len(row) 
@@ -107,13 +201,201 @@ def highlight_master_row(row, today, alert_days=30):
 
 def highlight_activity_row(row, today):
     """Activities 테이블에서 지연된 활동 행을 강조합니다."""
-    due_date = row['Due_Date']
-    status = row['Status']
-    
-    is_overdue = False
-    if pd.notnull(due_date):
-        is_overdue = (due_date.date() < today.date()) and (status != 'Done')
+    is_overdue = is_activity_overdue(row['Due_Date'], row['Status'], today)
     
     if is_overdue:
         return ['background-color: #ff4c4c40'] * len(row)
-    return [''] * len(row)
\ No newline at end of file
+    return [''] * len(row)
+
+# -----------------------------------------------------------------
+# 3. 시계열 차트 다운샘플링 (시간 버킷 + LTTB)
+# -----------------------------------------------------------------
+
+# 시간 단위별 대략적인 일수 (촘촘한 단위 -> 성긴 단위 순서)
+TIME_BUCKET_DAYS = {"D": 1, "W": 7, "M": 30.44, "Q": 91.31, "Y": 365.25}
+TIME_BUCKET_LABELS = {"자동": None, "일": "D", "주": "W", "월": "M", "분기": "Q", "연": "Y"}
+
+def choose_time_bucket(start, end, max_points):
+    """기간(start~end)을 max_points 개 이하로 나눌 수 있는 가장 촘촘한 시간 단위를 고릅니다."""
+    span_days = max((end - start).days, 0) + 1
+    for freq, days in TIME_BUCKET_DAYS.items():
+        if span_days / days <= max_points:
+            return freq
+    return "Y"
+
+def format_periods(periods, freq):
+    """Period 인덱스를 차트 축 라벨 문자열로 변환합니다. (월 단위는 기존 YearMonth 형식과 동일)"""
+    if freq == "W":
+        return periods.start_time.strftime("%Y-%m-%d")
+    return periods.astype(str)
+
+def lttb_downsample(x, y, n_out):
+    """Largest-Triangle-Three-Buckets 알고리즘으로 꺾은선 모양을 유지하며 n_out 개 점의 인덱스를 고릅니다."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # 첫/마지막 점은 항상 유지, 나머지를 n_out - 2 개 버킷으로 나눔
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start = edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+def resolve_time_bucket(engine, max_points, freq=None, start=None, end=None):
+    """
+    데이터 범위로 잘라낸 (start, end) 와 실제로 쓸 시간 단위를 구합니다. 기간 안에 데이터가 없으면 (None, None, None).
+    버킷 수가 max_points 를 넘지 않도록 지정한 단위가 너무 촘촘하면 더 성긴 단위로 올립니다.
+    (교차 필터의 기간별 막대/꺾은선은 같은 버킷을 쓰므로 점 수는 이 상한으로만 제한됨)
+    """
+    first, last = engine.bounds()
+    if first is None:
+        return None, None, None
+    start = first if start is None else max(pd.Timestamp(start).date(), first)
+    end = last if end is None else min(pd.Timestamp(end).date(), last)
+    if end < start:
+        return None, None, None
+
+    auto_freq = choose_time_bucket(start, end, max_points)
+    order = list(TIME_BUCKET_DAYS)
+    if freq is None or order.index(freq) < order.index(auto_freq):
+        freq = auto_freq
+    return start, end, freq
+
+# -----------------------------------------------------------------
+# 4. 교차 필터 차트용 사전 집계 (브라우저에서 필터링)
+# -----------------------------------------------------------------
+
+NO_PERIOD = "(날짜 없음)"
+UNSPECIFIED = "미지정"
+
+def _dimension(df, column, missing=UNSPECIFIED):
+    if column not in df.columns:
+        return pd.Series(missing, index=df.index)
+    return df[column].astype(object).where(df[column].notna(), missing).astype(str)
+
+class CrossfilterCubes:
+    """
+    교차 필터 차트에 보낼 사전 집계 표. 데이터 버전별로 한 번 만들어 모든 세션이 공유합니다.
+    활동 행마다 (상태, 국가, 활동 유형) 조합 코드를 KPI 엔진의 날짜 정렬 순서로 한 번만 구해 두고,
+    시간 단위별로 (기간, 조합) 건수를 한 번 집계합니다. 기간 필터는 이 집계에서 기간 범위만 잘라내고,
+    기간 경계에 걸친 앞/뒤 기간만 정렬 배열 구간으로 다시 세므로 슬라이더를 움직여도 activities_df 를 다시 훑지 않습니다.
+    """
+
+    def __init__(self, engine, master_df, activities_df):
+        self.engine = engine
+        master_countries = _dimension(master_df, 'Country')
+        kol_country = pd.Series(master_countries.to_numpy(), index=master_df['Kol_ID'].to_numpy())
+        kol_country = kol_country[~kol_country.index.duplicated()]
+
+        groups = pd.DataFrame({
+            'Status': _dimension(activities_df, 'Status', '(없음)').to_numpy(),
+            'Country': kol_country.reindex(activities_df['Kol_ID'].to_numpy()).fillna(UNSPECIFIED).to_numpy(),
+            'Activity_Type': _dimension(activities_df, 'Activity_Type').to_numpy(),
+        })
+        group_codes = groups.groupby(list(groups.columns), sort=False).ngroup().to_numpy()
+        self.groups = groups.drop_duplicates().reset_index(drop=True)  # ngroup(sort=False) 번호 = 처음 나온 순서
+        self.n_groups = max(len(self.groups), 1)
+        done = done_flags(activities_df['Status']).to_numpy()
+
+        # 💡 KPI 엔진과 같은 날짜 정렬 순서 -> 기간 필터 구간이 정렬 배열의 연속 구간이 됨
+        self.sorted_groups = group_codes[engine.order].astype(np.int64)
+        self.sorted_done = done[engine.order]
+        undated = np.ones(len(activities_df), dtype=bool)
+        undated[engine.order] = False
+        self.undated_count = np.bincount(group_codes[undated], minlength=len(self.groups))
+        self.undated_done = np.bincount(group_codes[undated], weights=done[undated], minlength=len(self.groups))
+
+        self.kol_cube = pd.DataFrame({
+            'Country': master_countries.to_numpy(),
+            'KOL_Type': _dimension(master_df, 'KOL_Type').to_numpy(),
+            'Budget': master_df['Budget (USD)'].to_numpy(dtype=float),
+        }).groupby(['Country', 'KOL_Type'], sort=False).agg(KOLs=('Budget', 'size'), Budget=('Budget', 'sum')).reset_index()
+
+        self._periods = {}
+        self._lock = threading.Lock()  # 여러 세션이 같은 객체를 공유
+
+    def _period_table(self, freq):
+        """시간 단위별 (기간 라벨, 기간 시작 위치, (기간, 조합) 키, 건수, 완료 수). 처음 요청될 때 한 번 집계합니다."""
+        with self._lock:
+            if freq not in self._periods:
+                first, last = self.engine.bounds()
+                periods = pd.period_range(first, last, freq=freq)
+                edges = [pd.Timestamp(first)] + list(periods.start_time[1:]) + [pd.Timestamp(last) + pd.Timedelta(days=1)]
+                edge_days = pd.DatetimeIndex(edges).to_numpy().astype('datetime64[D]').astype(np.int64)
+                pos = np.searchsorted(self.engine.days, edge_days, side='left')
+                period_codes = np.repeat(np.arange(len(periods), dtype=np.int64), np.diff(pos))
+                keys, inverse, counts = np.unique(period_codes * self.n_groups + self.sorted_groups, return_inverse=True, return_counts=True)
+                done = np.bincount(inverse, weights=self.sorted_done, minlength=len(keys))
+                self._periods[freq] = (np.asarray(format_periods(periods, freq), dtype=object), pos, keys, counts, done)
+            return self._periods[freq]
+
+    def activity_cube(self, start=None, end=None, freq=None):
+        """기간(start~end) 안의 Status x Country x Period x Activity_Type 별 Count / Done. 기간이 없으면 날짜 없는 활동도 포함."""
+        parts = []
+        if freq is not None:
+            labels, pos, keys, counts, done = self._period_table(freq)
+            lo, hi = self.engine.span(start, end)
+            first_full = int(np.searchsorted(pos, lo, side='left'))      # 모든 행이 기간 안에 있는 첫 기간
+            last_edge = int(np.searchsorted(pos, hi, side='right')) - 1  # 기간 안에서 시작하는 마지막 기간
+            if first_full <= last_edge:
+                a, b = np.searchsorted(keys, [first_full * self.n_groups, last_edge * self.n_groups])
+                parts.append((keys[a:b], counts[a:b], done[a:b]))
+                partial = [(lo, pos[first_full], first_full - 1), (pos[last_edge], hi, last_edge)]
+            else:
+                partial = [(lo, hi, last_edge)]
+            # 💡 경계에 걸친 기간은 해당 정렬 구간의 행만 다시 셈 (구간 길이는 최대 기간 하나)
+            for a, b, period in partial:
+                if b > a:
+                    parts.append((period * self.n_groups + self.sorted_groups[a:b], np.ones(b - a, dtype=np.int64), self.sorted_done[a:b]))
+
+        window_keys = np.concatenate([p[0] for p in parts]) if parts else np.array([], dtype=np.int64)
+        window_keys, inverse = np.unique(window_keys, return_inverse=True)
+        window_count = np.bincount(inverse, weights=np.concatenate([p[1] for p in parts]) if parts else None, minlength=len(window_keys))
+        window_done = np.bincount(inverse, weights=np.concatenate([p[2] for p in parts]) if parts else None, minlength=len(window_keys))
+        group_idx = window_keys % self.n_groups
+        cube = self.groups.iloc[group_idx].reset_index(drop=True)
+        cube.insert(2, 'Period', labels[window_keys // self.n_groups] if len(window_keys) else pd.Series(dtype=object))
+        cube['Count'], cube['Done'] = window_count.astype(np.int64), window_done.astype(np.int64)
+
+        if start is None and end is None:
+            undated = np.flatnonzero(self.undated_count)
+            cube = pd.concat([cube, self.groups.iloc[undated].assign(
+                Period=NO_PERIOD, Count=self.undated_count[undated].astype(np.int64), Done=self.undated_done[undated].astype(np.int64)
+            )], ignore_index=True)
+        return cube[['Status', 'Country', 'Period', 'Activity_Type', 'Count', 'Done']]
+
+    def window(self, max_points, freq=None, start=None, end=None):
+        """
+        기간 필터를 적용한 (activity_cube, kol_cube, period_labels) 를 반환합니다.
+        - activity_cube: Status x Country x Period x Activity_Type 별 Count(활동 수) / Done(완료 수)
+        - kol_cube: Country x KOL_Type 별 KOLs(KOL 수) / Budget(예산 합계)
+        - period_labels: 시간 순서대로 정렬된 Period 라벨 (차트 축 정렬용)
+        """
+        _, _, bucket = resolve_time_bucket(self.engine, max_points, freq, start, end)
+        period_labels = []
+        if bucket is not None:
+            # 💡 축에 쓸 기간 라벨은 KPI 엔진의 누적합으로 구함 (활동이 있는 기간만, 시간 순서)
+            period_labels = format_periods(pd.PeriodIndex(self.engine.period_series(start, end, bucket)['Period']), bucket).tolist()
+        return self.activity_cube(start, end, bucket), self.kol_cube, period_labels
+
+@st.cache_resource(max_entries=4)
+def get_crossfilter_cubes(data_version, _engine, _master_df, _activities_df):
+    """
+    데이터 버전별 CrossfilterCubes. 기간/시간 단위는 캐시 키가 아니며 window() 에서 적용합니다.
+    _activities_df 는 기간 필터를 적용하기 전 전체 활동 행이어야 합니다. (_ 로 시작하는 인자는 해시하지 않음)
+    """
+    return CrossfilterCubes(_engine, _master_df, _activities_df)
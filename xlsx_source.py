@@ -0,0 +1,76 @@
+import pandas as pd
+from openpyxl import load_workbook
+
+# -----------------------------------------------------------------
+# 0. 설정
+# -----------------------------------------------------------------
+HEADER_SCAN_ROWS = 30   # 제목(배너) 행을 건너뛰며 헤더 행을 찾을 최대 행 수
+EMPTY_RUN_LIMIT = 20    # 빈 행이 이만큼 연속되면 표가 끝난 것으로 보고 읽기 중단
+
+# -----------------------------------------------------------------
+# 1. 엑셀 통합 문서 스트리밍 읽기 (openpyxl read-only)
+# -----------------------------------------------------------------
+
+def _cell_text(value):
+    """CSV(dtype=str) 로 읽었을 때와 같도록 셀 값을 문자열로 맞춥니다. 빈 셀은 None."""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or None
+
+def _find_header(ws, columns):
+    """앞쪽 HEADER_SCAN_ROWS 행에서 필요한 열 이름이 가장 많이 들어 있는 행을 헤더로 고릅니다. (행 번호, {열 이름: 열 위치})"""
+    best_row, best_hits = None, {}
+    for row_idx, row in enumerate(ws.iter_rows(max_row=HEADER_SCAN_ROWS, values_only=True), start=1):
+        hits = {}
+        for col_idx, value in enumerate(row, start=1):
+            name = _cell_text(value)
+            if name in columns and name not in hits:
+                hits[name] = col_idx
+        if len(hits) > len(best_hits):
+            best_row, best_hits = row_idx, hits
+            if len(hits) == len(columns):
+                break
+    return best_row, best_hits
+
+def _read_sheet(ws, columns):
+    """헤더 아래에서 필요한 열 범위만, 사용 영역(used range) 안에서 스트리밍으로 읽습니다."""
+    header_row, positions = _find_header(ws, columns)
+    if header_row is None:
+        return pd.DataFrame(columns=list(columns), dtype=object)
+
+    names = list(positions)
+    min_col, max_col = min(positions.values()), max(positions.values())
+    offsets = [positions[name] - min_col for name in names]
+
+    records, empty_run = [], 0
+    for row in ws.iter_rows(min_row=header_row + 1, max_row=ws.max_row, min_col=min_col, max_col=max_col, values_only=True):
+        values = [_cell_text(row[i]) if i < len(row) else None for i in offsets]
+        if all(v is None for v in values):
+            empty_run += 1
+            if empty_run >= EMPTY_RUN_LIMIT:
+                break
+            continue
+        empty_run = 0
+        records.append(values)
+    return pd.DataFrame(records, columns=names, dtype=object)
+
+def read_workbook_tables(path, tables):
+    """
+    통합 문서를 한 번만 열어 여러 시트를 읽습니다.
+    tables: {테이블 이름: (시트 이름 또는 None(첫 시트), [필요한 열 이름])}
+    반환: {테이블 이름: DataFrame} (필요한 열 중 시트에 있는 열만, 값은 문자열)
+    """
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        result = {}
+        for table, (sheet, columns) in tables.items():
+            ws = workbook[sheet] if sheet else workbook.worksheets[0]
+            if ws.max_row is None or ws.max_column is None:
+                ws.reset_dimensions()  # 크기 정보가 없는 파일: 끝까지 스트리밍
+            result[table] = _read_sheet(ws, set(columns))
+        return result
+    finally:
+        workbook.close()